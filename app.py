@@ -1,20 +1,36 @@
-from flask import Flask, render_template, request
-import threading
+from flask import Flask, Response, abort, jsonify, make_response, redirect, render_template, request, stream_with_context
+import json
 import time
 import sys
-from nexus.state import state
-from nexus.watcher import poll_lol_api
+from nexus import metrics
+from nexus.state import settings as user_settings
+from nexus.session import sessions
+from nexus.watcher import poller
 from nexus.config import Config
 from nexus.ai import ai
+from nexus.history import match_store
 
 app = Flask(__name__)
 
-# Start background thread
-threading.Thread(target=poll_lol_api, daemon=True).start()
+# Versions restart at 0 with the process: keep ETags from a previous run from matching
+BOOT_ID = f"{int(time.time()):x}"
+
+# Start background polling of every session
+poller.start(sessions.values())
+
+def _session(name):
+    session = sessions.get(name)
+    if session is None:
+        abort(404)
+    return session
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return redirect(f"/session/{next(iter(sessions))}")
+
+@app.route('/session/<name>')
+def dashboard(name):
+    return render_template('index.html', session=_session(name), sessions=sessions)
 
 @app.route('/settings', methods=['GET', 'POST'])
 def settings():
@@ -24,44 +40,155 @@ def settings():
 
         print(f"Updating settings: model={model_name}, debug={debug_mode}", flush=True)
         
-        # Update State
-        state.debug_mode = debug_mode
+        # Update Settings (shared by every session)
+        user_settings.debug_mode = debug_mode
         
         # Update AI Model
-        if model_name and model_name != state.gemini_model:
+        if model_name and model_name != user_settings.gemini_model:
             ai.update_model(model_name)
             
         return '<span class="text-green-400">Paramètres sauvegardés !</span>'
     
-    return render_template('settings.html', current_model=state.gemini_model, debug_mode=state.debug_mode)
+    return render_template('settings.html', current_model=user_settings.gemini_model, debug_mode=user_settings.debug_mode)
 
-@app.route('/api/advice')
-def get_advice():
-    return state.latest_advice
+def _history_data():
+    """Match history aggregates, filtered by the `champion` and `role` query parameters."""
+    filters = {key: request.args.get(key) or None for key in ('champion', 'role')}
+    return {
+        'filters': filters,
+        'overall': match_store.stats(**filters),
+        'champions': match_store.champions(role=filters['role']),
+        'matchups': match_store.matchups(**filters),
+        'recent': match_store.recent(**filters),
+    }
 
-@app.route('/api/gamemode')
-def get_gamemode():
-    return state.current_game_mode
+@app.template_filter('datetime')
+def format_datetime(timestamp):
+    return time.strftime('%d/%m/%Y %H:%M', time.localtime(timestamp))
 
-@app.route('/api/gametime')
-def get_gametime():
-    return state.last_advice_gametime
+@app.route('/history')
+def history():
+    return render_template('history.html', **_history_data())
 
-@app.route('/api/next-update')
-def get_next_update():
-    if state.current_game_mode in ["Offline", "Error", "PostGame"]:
-        return "--"
-    
-    time_since_last = time.time() - state.last_gemini_call
-    remaining = max(0, Config.AI_UPDATE_INTERVAL - time_since_last)
-    
-    if remaining == 0:
-        return "En cours..."
-        
-    return f"{int(remaining)}s"
+@app.route('/api/history')
+def get_history():
+    return jsonify(_history_data())
+
+def _versioned(snapshot, render, extra=None):
+    """
+    Renders `snapshot` with an ETag built from its version, or answers
+    304 Not Modified if the client already holds that version.
+    """
+    etag = f"{BOOT_ID}-{snapshot['version']}" + (f"-{extra}" if extra is not None else "")
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = make_response(render(snapshot))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/<name>/advice')
+def get_advice(name):
+    return _versioned(_session(name).state.snapshot(), lambda snap: snap['latest_advice'])
+
+@app.route('/api/<name>/gamemode')
+def get_gamemode(name):
+    return _versioned(_session(name).state.snapshot(), lambda snap: snap['current_game_mode'])
+
+@app.route('/api/<name>/gametime')
+def get_gametime(name):
+    return _versioned(_session(name).state.snapshot(), lambda snap: snap['last_advice_gametime'])
+
+def _next_update_plan(snap):
+    """Next AI analysis as planned by the advice scheduler (remaining is None when none is planned)."""
+    if snap['current_game_mode'] in ["Offline", "Error", "PostGame"]:
+        return {'remaining': None, 'text': "--", 'reason': ""}
+
+    plan = snap['advice_plan']
+    remaining = None if plan['deadline'] is None else max(0, int(plan['deadline'] - time.time()))
+    return {'remaining': remaining, 'text': plan['text'], 'reason': plan['reason']}
+
+@app.route('/api/<name>/next-update')
+def get_next_update(name):
+    snap = _session(name).state.snapshot()
+    plan = _next_update_plan(snap)
+    # The countdown changes every second without a new version
+    return _versioned(snap, lambda _: _next_update_text(plan), extra=plan['remaining'])
+
+def _next_update_text(plan):
+    if plan['remaining'] is None:
+        text = plan['text']
+    elif plan['remaining'] == 0:
+        text = "En cours..."
+    else:
+        text = f"{plan['remaining']}s"
+
+    return f"{text} ({plan['reason']})" if plan['reason'] else text
+
+@app.route('/api/<name>/latency')
+def get_latency(name):
+    # Not part of the game state: the ETag is a hash of the body
+    response = jsonify(_session(name).client.latency_report())
+    response.add_etag()
+    return response.make_conditional(request)
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus text exposition of the counters, gauges and histograms of nexus/metrics.py."""
+    now = time.time()
+    for name, session in sessions.items():
+        last_call = session.state.snapshot()['last_gemini_call']
+        metrics.ADVICE_AGE_SECONDS.labels(session=name).set(now - last_call if last_call else float('nan'))
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def _sse_message(event, data):
+    lines = "\n".join(f"data: {line}" for line in str(data).splitlines() or [""])
+    return f"event: {event}\n{lines}\n\n"
+
+@app.route('/api/<name>/stream')
+def stream(name):
+    """
+    Server-Sent Events feed of the dashboard: an event is pushed only when a
+    GameState field actually changes. The countdown is sent when the advice
+    plan changes and ticked client-side.
+    """
+    state = _session(name).state
+
+    def events():
+        sent = {}
+        version = -1
+        while True:
+            snap = state.wait_for_change(version, timeout=Config.SSE_KEEPALIVE)
+            version = snap['version']
+            plan = _next_update_plan(snap)
+            current = {
+                'advice': (snap['latest_advice'], snap['latest_advice']),
+                'gamemode': (snap['current_game_mode'], snap['current_game_mode']),
+                'gametime': (snap['last_advice_gametime'], snap['last_advice_gametime']),
+                'next-update': (
+                    (snap['current_game_mode'], plan['text'], plan['reason'], snap['advice_plan']['deadline']),
+                    json.dumps(plan),
+                ),
+            }
+
+            messages = []
+            for event, (key, data) in current.items():
+                if sent.get(event) != key:
+                    sent[event] = key
+                    messages.append(_sse_message(event, data))
+
+            # Comment line keeps proxies from closing an idle connection
+            yield "".join(messages) or ": keepalive\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
 
 if __name__ == '__main__':
     if "--debug" in sys.argv:
-        state.debug_mode = True
-        print("DEBUG MODE ENABLED: Prompts will be saved to ./prompt/", flush=True)
+        user_settings.debug_mode = True
+        print(f"DEBUG MODE ENABLED: Prompts, responses and snapshots will be captured to ./{Config.DEBUG_CAPTURE_DIR}/", flush=True)
     app.run(host='0.0.0.0', port=5000)
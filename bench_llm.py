@@ -0,0 +1,72 @@
+"""
+Offline p50/p99 advice latency with the fake LLM backend (no network).
+
+Usage:
+    python bench_llm.py [--calls 200] [--scale 0.05]
+
+The primary backend follows a scripted heavy-tailed latency profile with a few
+failures; the hedge backend stands for a faster model. Every delay is multiplied
+by --scale so the run stays short, and reported numbers are scaled back.
+"""
+import argparse
+import time
+from nexus.config import Config
+from nexus.llm import FakeBackend, ResilientBackend
+
+# First-chunk latency of each call (seconds), cycled; an exception fails the call
+PRIMARY_SCRIPT = (
+    1.0, 0.9, 1.2, 0.8, 1.1, 1.0, 0.9, 1.3, 1.0, 6.5,
+    1.1, 0.8, 1.0, RuntimeError("503 Service Unavailable"), 0.9, 1.2, 1.0, 0.9, 14.0, 1.1,
+)
+HEDGE_SCRIPT = (0.5, 0.6, 0.5, 0.7, 0.6)
+
+def scenarios(scale):
+    def primary():
+        return FakeBackend(tuple(s * scale if isinstance(s, float) else s for s in PRIMARY_SCRIPT),
+                           chunk_delay=0.05 * scale, name="primary")
+
+    def hedge():
+        return FakeBackend(tuple(s * scale for s in HEDGE_SCRIPT), chunk_delay=0.05 * scale, name="hedge")
+
+    common = dict(first_chunk_timeout=Config.AI_FIRST_CHUNK_TIMEOUT * scale,
+                  request_timeout=Config.AI_REQUEST_TIMEOUT * scale)
+    return {
+        "primary only": ResilientBackend(primary(), **common),
+        "retries": ResilientBackend(primary(), retries=Config.AI_RETRIES,
+                                    backoff=Config.AI_RETRY_BACKOFF * scale, **common),
+        "retries + hedge": ResilientBackend(primary(), hedge(), hedge_after=Config.AI_HEDGE_AFTER * scale,
+                                            retries=Config.AI_RETRIES, backoff=Config.AI_RETRY_BACKOFF * scale,
+                                            **common),
+    }
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def run(backend, calls, scale):
+    first_chunk, total, errors = [], [], 0
+    for _ in range(calls):
+        started = time.perf_counter()
+        first = None
+        try:
+            for _ in backend.stream("prompt"):
+                first = first or time.perf_counter()
+        except Exception:
+            errors += 1
+            continue
+        first_chunk.append((first - started) / scale)
+        total.append((time.perf_counter() - started) / scale)
+    return first_chunk, total, errors
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--scale", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{args.calls} calls per scenario, delays x{args.scale}")
+    print(f"{'scenario':<16} {'first p50':>10} {'first p99':>10} {'total p50':>10} {'total p99':>10} {'errors':>7}")
+    for name, backend in scenarios(args.scale).items():
+        first_chunk, total, errors = run(backend, args.calls, args.scale)
+        print(f"{name:<16} {percentile(first_chunk, 0.5):9.2f}s {percentile(first_chunk, 0.99):9.2f}s "
+              f"{percentile(total, 0.5):9.2f}s {percentile(total, 0.99):9.2f}s {errors:>7}")
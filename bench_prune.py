@@ -0,0 +1,87 @@
+"""
+Compare prune_data (recursive) with project_game_data (compiled projection).
+
+Usage:
+    python bench_prune.py [allgamedata.json | recording.jsonl.gz ...]
+
+Without arguments, a synthetic late-game payload (10 players, 6 items each,
+400 events) is used.
+"""
+import json
+import sys
+import timeit
+from nexus.replay import load_recording
+from nexus.utils import prune_data, project_game_data
+
+def _rune(name, rune_id):
+    return {'displayName': name, 'id': rune_id, 'rawDescription': 'x' * 60, 'rawDisplayName': 'x' * 40}
+
+def synthetic_late_game_payload():
+    items = [
+        {'canUse': False, 'consumable': False, 'count': 1, 'displayName': f'Item {i}', 'itemID': 3000 + i,
+         'price': 1000, 'rawDescription': 'x' * 80, 'rawDisplayName': 'x' * 40, 'slot': i}
+        for i in range(6)
+    ]
+    players = [
+        {
+            'championName': f'Champion{i}', 'isBot': False, 'isDead': False, 'items': items, 'level': 16,
+            'position': ['TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY'][i % 5], 'rawChampionName': 'x' * 40,
+            'respawnTimer': 0.0, 'riotId': f'Player{i}#EUW', 'riotIdGameName': f'Player{i}', 'riotIdTagLine': 'EUW',
+            'runes': {'keystone': _rune('Conqueror', 8010), 'primaryRuneTree': _rune('Precision', 8000),
+                      'secondaryRuneTree': _rune('Resolve', 8400)},
+            'scores': {'assists': 7, 'creepScore': 240, 'deaths': 4, 'kills': 6, 'wardScore': 30.5},
+            'skinID': 3, 'summonerName': f'Player{i}',
+            'summonerSpells': {'summonerSpellOne': {'displayName': 'Flash', 'rawDescription': 'x' * 60},
+                               'summonerSpellTwo': {'displayName': 'Ignite', 'rawDescription': 'x' * 60}},
+            'team': 'ORDER' if i < 5 else 'CHAOS',
+        }
+        for i in range(10)
+    ]
+    return {
+        'activePlayer': {
+            'abilities': {key: {'abilityLevel': 3, 'displayName': key, 'rawDescription': 'x' * 80} for key in 'QWER'},
+            'championStats': {f'stat{i}': float(i) for i in range(30)},
+            'currentGold': 1234.5,
+            'fullRunes': {'generalRunes': [_rune(f'Rune{i}', i) for i in range(6)]},
+            'level': 16, 'riotId': 'Player0#EUW', 'summonerName': 'Player0', 'teamRelativeColors': True,
+        },
+        'allPlayers': players,
+        'events': {'Events': [
+            {'EventID': i, 'EventName': 'ChampionKill', 'EventTime': i * 5.0,
+             'KillerName': 'Player1', 'VictimName': 'Player6', 'Assisters': ['Player2']}
+            for i in range(400)
+        ]},
+        'gameData': {'gameMode': 'CLASSIC', 'gameTime': 2000.0, 'mapName': 'Map11', 'mapNumber': 11,
+                     'mapTerrain': 'Default'},
+    }
+
+def load_payloads(paths):
+    payloads = []
+    for path in paths:
+        if path.endswith(".jsonl.gz"):
+            payloads.extend(snapshot for _, snapshot in load_recording(path))
+            continue
+        with open(path, encoding="utf-8") as f:
+            payloads.append(json.load(f))
+    return payloads
+
+def bench(name, fn, payloads, number):
+    seconds = timeit.timeit(lambda: [fn(p) for p in payloads], number=number)
+    per_call = seconds / (number * len(payloads)) * 1e6
+    print(f"{name:<20} {per_call:10.1f} µs/payload")
+    return per_call
+
+if __name__ == '__main__':
+    payloads = load_payloads(sys.argv[1:]) or [synthetic_late_game_payload()]
+    number = 200
+
+    print(f"{len(payloads)} payload(s), {number} rounds")
+    before = bench("prune_data", prune_data, payloads, number)
+    after = bench("project_game_data", project_game_data, payloads, number)
+    print(f"speedup: x{before / after:.1f}")
+
+    same_output = all(
+        json.dumps(prune_data(p), sort_keys=True) == json.dumps(project_game_data(p), sort_keys=True)
+        for p in payloads
+    )
+    print(f"identical output: {same_output}")
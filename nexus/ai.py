@@ -1,89 +1,194 @@
-import google.generativeai as genai
-import json
 import time
-import os
+from . import metrics
 from .config import Config
-from .state import state
-from .utils import get_loader_html, format_gametime, prune_data
+from .state import settings
+from .utils import get_loader_html, format_gametime, render_partial_html
+from .prompt import estimate_tokens
+from .cache import AdviceCache, early_game_cache
+from .llm import create_backend
+from .capture import debug_capture
+from .history import match_store
 
 class AI:
     def __init__(self):
-        self.model = None
+        self.backend = None
         self.initialize_model()
 
     def initialize_model(self):
-        if state.gemini_api_key:
-            genai.configure(api_key=state.gemini_api_key)
-            try:
-                self.model = genai.GenerativeModel(state.gemini_model)
-                print(f"Gemini model initialized: {state.gemini_model}", flush=True)
-            except Exception as e:
-                print(f"Error initializing Gemini model {state.gemini_model}: {e}", flush=True)
-                self.model = None
-        else:
+        if not Config.GEMINI_FAKE and not settings.gemini_api_key:
             print("Error: GEMINI_API_KEY not found in environment variables.", flush=True)
-            self.model = None
+            self.backend = None
+            return
+
+        try:
+            self.backend = create_backend(settings.gemini_model, settings.gemini_api_key)
+            print(f"Gemini model initialized: {self.backend.name}", flush=True)
+        except Exception as e:
+            print(f"Error initializing Gemini model {settings.gemini_model}: {e}", flush=True)
+            self.backend = None
 
     def update_model(self, model_name):
-        state.gemini_model = model_name
+        settings.gemini_model = model_name
         self.initialize_model()
         return True
 
-    def generate_advice(self, game_data, game_time, my_champion, my_position, direct_opponent, my_team, enemy_team, game_mode):
-        if not self.model:
+    def generate_advice(self, session, game_data, game_time, my_champion, my_position, direct_opponent, my_team, enemy_team, game_mode, features=None):
+        if not self.backend:
             return
 
+        # The scheduler already decided this call is due (see AdviceScheduler)
         current_time = time.time()
-        # Check if we should call Gemini (every 2 minutes)
-        if current_time - state.last_gemini_call > Config.AI_UPDATE_INTERVAL:
-            try:
-                context_history = state.advice_history[-3:] if state.advice_history else "Aucun historique."
-                
-                # EARLY GAME STRATEGY (< 2 minutes)
-                if game_time < 120:
-                    print("Generating Early Game Plan...", flush=True)
-                    state.latest_advice = get_loader_html("Génération du plan de jeu (Early Game)...")
-                    prompt = self._create_early_game_prompt(my_champion, my_position, direct_opponent, my_team, enemy_team, game_mode)
-                
-                # STANDARD ADVICE (> 2 minutes)
-                else:
-                    print("Generating Tactical Advice...", flush=True)
-                    state.latest_advice = get_loader_html("Analyse tactique en cours...")
-                    prompt = self._create_tactical_prompt(my_champion, my_team, enemy_team, game_mode, context_history, game_data)
-
-                self._save_debug_data(prompt, game_data)
-                
-                response = self.model.generate_content(prompt)
-                if response.text:
-                    state.latest_advice = response.text
-                    state.last_gemini_call = current_time
-                    state.advice_history.append(state.latest_advice)
-                    state.last_advice_gametime = format_gametime(game_time)
-            
-            except Exception as e:
-                print(f"Gemini Error: {e}", flush=True)
-                state.latest_advice = f"Erreur IA: {str(e)}"
-
-    def generate_post_game_report(self, full_game_data):
-        if not self.model:
+        state = session.state
+        scheduler = state.advice_scheduler
+        prompt_builder = state.prompt_builder
+        try:
+            cache_keys = None
+            kind = "tactical"
+
+            # EARLY GAME STRATEGY (< 2 minutes)
+            if game_time < 120:
+                # Same matchup as a previous game: the plan is already known
+                cache_keys = AdviceCache.make_keys(my_champion, my_position, direct_opponent, my_team, enemy_team, game_mode)
+                exact_key, near_key = cache_keys
+                cached = early_game_cache.get(exact_key, near_key if Config.ADVICE_CACHE_NEAR_MATCH else None)
+                metrics.ADVICE_CACHE.labels(result="hit" if cached else "miss").inc()
+                if cached:
+                    print("Early Game Plan served from cache", flush=True)
+                    self._deliver(state, cached, current_time, game_time, scheduler, prompt_builder)
+                    return
+
+                kind = "early"
+
+                print("Generating Early Game Plan...", flush=True)
+                state.latest_advice = get_loader_html("Génération du plan de jeu (Early Game)...")
+                history = match_store.early_game_context(my_champion, my_position, direct_opponent)
+                prompt = self._create_early_game_prompt(my_champion, my_position, direct_opponent, my_team, enemy_team, game_mode, history)
+
+            # STANDARD ADVICE (> 2 minutes)
+            else:
+                print("Generating Tactical Advice...", flush=True)
+                state.latest_advice = get_loader_html("Analyse tactique en cours...")
+                prompt = self._create_tactical_prompt(prompt_builder, my_champion, game_mode, game_data, game_time, features)
+                state.last_prompt_tokens = estimate_tokens(prompt)
+                print(f"Tactical prompt: ~{state.last_prompt_tokens} tokens", flush=True)
+
+            text = self._stream_to_state(session, prompt, kind, game_data)
+            if text is None:
+                return
+            if not text:
+                raise ValueError("Réponse vide")
+
+            advice = render_partial_html(text)
+            self._deliver(state, advice, current_time, game_time, scheduler, prompt_builder)
+            if cache_keys:
+                early_game_cache.put(*cache_keys, advice)
+
+        except Exception as e:
+            print(f"Gemini Error: {e}", flush=True)
+            if session.worker.cancelled():
+                return
+            scheduler.failed()
+            state.publish(latest_advice=f"Erreur IA: {str(e)}", advice_plan=scheduler.plan())
+
+    def _deliver(self, state, advice, call_time, game_time, scheduler, prompt_builder):
+        state.advice_history.append(advice)
+        prompt_builder.commit(advice)
+        scheduler.completed()
+        # Advice, its game time and the next plan are seen together
+        state.publish(
+            latest_advice=advice,
+            last_gemini_call=call_time,
+            last_advice_gametime=format_gametime(game_time),
+            advice_plan=scheduler.plan(),
+        )
+
+    def summarize_phases(self, summarizer, timeline, end_time):
+        """Map step: folds the game time not yet summarized into the summary of its phase."""
+        if not self.backend:
+            return
+
+        try:
+            for phase, start, end in summarizer.pieces(end_time):
+                prompt = self._create_phase_prompt(phase, summarizer.summaries.get(phase), timeline.window_summary(start, end))
+                summary = "".join(self._llm_stream(prompt, "summary"))
+                summarizer.covered(phase, summary.strip()[:Config.PHASE_SUMMARY_MAX_CHARS], end)
+                print(f"Phase summary updated: {phase} until {format_gametime(end)}", flush=True)
+            summarizer.completed()
+        except Exception as e:
+            print(f"Phase Summary Error: {e}", flush=True)
+            summarizer.failed()
+
+    def generate_post_game_report(self, session, end_state, phase_summaries, tail_summary, game_id=None):
+        """Reduce step: the report only combines the phase summaries built during the game."""
+        if not self.backend:
             return
+        state = session.state
 
         print("Game ended. Generating Post-Game Report...", flush=True)
-        state.latest_advice = get_loader_html("Partie terminée. Génération du rapport de fin de match...")
-        state.current_game_mode = "PostGame"
+        state.publish(
+            latest_advice=get_loader_html("Partie terminée. Génération du rapport de fin de match..."),
+            current_game_mode="PostGame",
+        )
         
         try:
-            prompt = self._create_post_game_prompt(full_game_data)
-            response = self.model.generate_content(prompt)
-            if response.text:
-                state.latest_advice = response.text
-                state.last_valid_game_data = None # Reset to avoid loop
+            prompt = self._create_post_game_prompt(end_state, phase_summaries, tail_summary)
+            text = self._stream_to_state(session, prompt, "postgame")
+            if text:
+                state.latest_advice = render_partial_html(text)
+                if game_id:
+                    match_store.save_report(game_id, state.latest_advice)
         except Exception as e:
             print(f"Post-Game Error: {e}", flush=True)
             state.latest_advice = f"Erreur Analyse Fin de Partie: {str(e)}"
-            state.last_valid_game_data = None
 
-    def _create_early_game_prompt(self, my_champion, my_position, direct_opponent, my_team, enemy_team, game_mode):
+    def _llm_stream(self, prompt, kind, session_name=None, game_data=None):
+        """
+        backend.stream() with its metrics (prompt size, latency and outcome per kind
+        of call) and, in debug mode, the capture of the prompt and the response.
+        """
+        metrics.PROMPT_CHARS.labels(kind=kind).observe(len(prompt))
+        metrics.PROMPT_TOKENS.labels(kind=kind).observe(estimate_tokens(prompt))
+        call_id = debug_capture.new_call(kind, prompt, session_name, game_data) if settings.debug_mode else None
+        started = time.perf_counter()
+        chunks = []
+        outcome = "cancelled"
+        try:
+            for chunk_text in self.backend.stream(prompt):
+                if not chunks:
+                    metrics.LLM_FIRST_CHUNK_SECONDS.labels(kind=kind).observe(time.perf_counter() - started)
+                chunks.append(chunk_text)
+                yield chunk_text
+            outcome = "ok"
+            metrics.LLM_SECONDS.labels(kind=kind).observe(time.perf_counter() - started)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            metrics.LLM_REQUESTS.labels(kind=kind, outcome=outcome).inc()
+            if call_id:
+                debug_capture.record('response', call_id=call_id, outcome=outcome, text="".join(chunks),
+                                     seconds=round(time.perf_counter() - started, 3))
+
+    def _stream_to_state(self, session, prompt, kind, game_data=None):
+        """
+        Streams the answer into the session's latest_advice chunk by chunk.
+        Returns the full text, or None if the call was cancelled mid-stream.
+        """
+        started = time.time()
+        text = ""
+        chunks = self._llm_stream(prompt, kind, session.name, game_data)
+        for chunk_text in chunks:
+            if session.worker.cancelled():
+                chunks.close()
+                return None
+            if not text:
+                print(f"First chunk after {time.time() - started:.1f}s", flush=True)
+            text += chunk_text
+            session.state.latest_advice = render_partial_html(text, streaming=True)
+
+        return None if session.worker.cancelled() else text
+
+    def _create_early_game_prompt(self, my_champion, my_position, direct_opponent, my_team, enemy_team, game_mode, history=""):
         return (
             "Tu es un coach Challenger sur League of Legends. "
             "La partie vient de commencer. Donne un plan de jeu complet.\n\n"
@@ -92,7 +197,8 @@ class AI:
             f"MON ÉQUIPE: {', '.join(my_team)}\n"
             f"ÉQUIPE ADVERSE: {', '.join(enemy_team)}\n"
             f"MODE DE JEU: {game_mode}\n\n"
-            "INSTRUCTIONS:"
+            + (f"MON HISTORIQUE (parties précédentes):\n{history}\n\n" if history else "")
+            + "INSTRUCTIONS:"
             "1. Donne un plan de jeu global pour la partie (Win Conditions)."
             "2. Donne les 6 items finaux à faire dans l'ordre idéal."
             "3. Donne des conseils spécifiques pour la phase de lane contre mon opposant direct.\n"
@@ -106,17 +212,15 @@ class AI:
             "<ol><li>Item 1</li><li>Item 2</li>...</ol>"
         )
 
-    def _create_tactical_prompt(self, my_champion, my_team, enemy_team, game_mode, context_history, game_data):
-        return (
+    def _create_tactical_prompt(self, prompt_builder, my_champion, game_mode, game_data, game_time, features=None):
+        header = (
             "Tu es un coach Challenger sur League of Legends. "
             "Ton but est de donner un avantage tactique immédiat.\n\n"
             f"JOUEUR ACTUEL: {my_champion} (Moi)\n"
-            f"MON ÉQUIPE: {', '.join(my_team)}\n"
-            f"ÉQUIPE ADVERSE: {', '.join(enemy_team)}\n"
-            f"MODE DE JEU: {game_mode}\n"
-            f"CONTEXTE (Tes précédents conseils): {context_history}\n\n"
-            f"DONNÉES ACTUELLES DE LA PARTIE: {json.dumps(game_data)}\n\n"
-            "INSTRUCTIONS:"
+            f"MODE DE JEU: {game_mode}\n\n"
+        )
+        instructions = (
+            "\n\nINSTRUCTIONS:"
             "1. Analyse la situation actuelle (Golds, XP, Items, KDA, Objectifs)."
             "2. Propose un plan d'action concret pour les 2 prochaines minutes."
             "3. Suggère les prochains items à acheter en fonction de la game."
@@ -130,12 +234,31 @@ class AI:
             "<h3>⚔️ Itemisation Recommandée</h3>"
             "<ul><li><strong>Achat Prioritaire</strong>: Nom de l'item (Pourquoi ?)</li></ul>"
         )
+        # Only what changed since the last advice, within the token budget
+        budget = Config.PROMPT_TOKEN_BUDGET - estimate_tokens(header + instructions)
+        context = prompt_builder.build(game_data, game_time, my_champion, budget, features)
+        return header + context + instructions
 
-    def _create_post_game_prompt(self, full_game_data):
+    def _create_phase_prompt(self, phase, previous_summary, window_summary):
+        return (
+            "Tu es un analyste League of Legends. Résume cette phase de jeu pour un rapport de fin de match.\n\n"
+            f"PHASE: {phase}\n"
+            f"RÉSUMÉ PRÉCÉDENT DE LA PHASE: {previous_summary or 'Aucun'}\n\n"
+            f"NOUVELLES DONNÉES:\n{window_summary}\n\n"
+            "INSTRUCTIONS:"
+            "1. Mets à jour le résumé de la phase avec les nouvelles données (il le remplace)."
+            "2. Garde l'essentiel : avance en or/items, objectifs, combats décisifs, erreurs du joueur."
+            "3. Texte brut, 5 points maximum, 80 mots maximum."
+        )
+
+    def _create_post_game_prompt(self, end_state, phase_summaries, tail_summary):
+        phases = "\n".join(f"- {phase}: {summary}" for phase, summary in phase_summaries) or "Aucun résumé disponible."
         return (
             "Tu es un coach Challenger sur League of Legends. "
             "La partie vient de se terminer. Fais un rapport complet.\n\n"
-            f"DONNÉES COMPLÈTES DE LA PARTIE: {json.dumps(full_game_data)}\n\n"
+            f"ÉTAT FINAL DE LA PARTIE:\n{end_state}\n\n"
+            f"RÉSUMÉS DES PHASES DE JEU:\n{phases}\n\n"
+            f"FIN DE PARTIE (non résumée):\n{tail_summary}\n\n"
             "INSTRUCTIONS:"
             "1. Analyse la performance globale (KDA, Golds, Objectifs, Items)."
             "2. Identifie les moments clés (Teamfights, Prises d'objectifs)."
@@ -150,21 +273,5 @@ class AI:
             "<ul><li>Conseil 1...</li><li>Conseil 2...</li></ul>"
         )
 
-    def _save_debug_data(self, prompt, game_data):
-        if state.debug_mode:
-            try:
-                os.makedirs("prompt", exist_ok=True)
-                timestamp = int(time.time())
-                
-                with open(f"prompt/prompt_{timestamp}.txt", "w", encoding="utf-8") as f:
-                    f.write(prompt)
-                
-                with open(f"prompt/game_data_{timestamp}.json", "w", encoding="utf-8") as f:
-                    json.dump(game_data, f, indent=4)
-                    
-                print(f"DEBUG: Saved prompt and game data for timestamp {timestamp}", flush=True)
-            except Exception as e:
-                print(f"DEBUG ERROR: Could not save debug files: {e}", flush=True)
-
 # Singleton
 ai = AI()
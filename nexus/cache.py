@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from .config import Config
+
+class AdviceCache:
+    """
+    Cache of early-game plans keyed by matchup, LRU-evicted with a TTL and persisted to disk.
+
+    The exact key covers everything the early-game prompt depends on (champion,
+    position, direct opponent, both team comps, game mode). When there is no
+    exact hit, a plan for the same champion, position and opponent can be
+    reused ("near match").
+    """
+
+    def __init__(self, path, max_entries, ttl):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._near = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def make_keys(champion, position, opponent, my_team, enemy_team, game_mode):
+        near = "|".join((game_mode, champion, position, opponent))
+        exact = "|".join((near, ",".join(sorted(my_team)), ",".join(sorted(enemy_team))))
+        return exact, near
+
+    def get(self, key, near=None):
+        with self._lock:
+            entry = self._valid(key)
+            if entry is None and near is not None:
+                entry = self._valid(self._near.get(near))
+            if entry is None:
+                return None
+            self._entries.move_to_end(entry['key'])
+            return entry['advice']
+
+    def put(self, key, near, advice):
+        with self._lock:
+            self._entries[key] = {'key': key, 'near': near, 'advice': advice, 'created': time.time()}
+            self._entries.move_to_end(key)
+            self._near[near] = key
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+            self._save()
+
+    def _valid(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and time.time() - entry['created'] > self.ttl:
+            self._drop(key)
+            return None
+        return entry
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        if self._near.get(entry['near']) == key:
+            del self._near[entry['near']]
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Advice cache could not be loaded: {e}", flush=True)
+            return
+
+        for entry in entries:
+            self._entries[entry['key']] = entry
+            self._near[entry['near']] = entry['key']
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self._entries.values()), f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Advice cache could not be saved: {e}", flush=True)
+
+# Singleton
+early_game_cache = AdviceCache(Config.ADVICE_CACHE_PATH, Config.ADVICE_CACHE_SIZE, Config.ADVICE_CACHE_TTL)
@@ -0,0 +1,239 @@
+"""
+Debug capture of the AI path: prompts, responses and game snapshots in a
+rotating, compressed JSONL session log (written when debug mode is on).
+
+    python -m nexus.capture list prompt/
+    python -m nexus.capture export prompt/ <call_id> [--out DIR]
+    python -m nexus.capture replay prompt/ game.jsonl.gz [--session NAME] [--game N]
+
+`replay` rebuilds a recording for nexus.replay from the captured snapshots.
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from .config import Config
+
+class DebugCapture:
+    """
+    Background writer of the debug session log.
+
+    `record()` only queues the record: a thread writes the queue in batches,
+    each batch appended to the current file as one gzip member, so a file is
+    readable at any time. Files rotate past `max_bytes` or `max_age` seconds and
+    the oldest are deleted beyond `max_files` or `retention` seconds. When the
+    queue is full, records are dropped rather than slowing down the caller.
+    """
+
+    def __init__(self, directory, max_bytes, max_age, max_files, retention, flush_interval=2.0, queue_size=1000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_files = max_files
+        self.retention = retention
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._path = None
+        self._opened = 0
+        self._sequence = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def record(self, kind, **fields):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait({'t': round(time.time(), 3), 'kind': kind, **fields})
+        except queue.Full:
+            self.dropped += 1
+
+    def new_call(self, call_kind, prompt, session=None, game_data=None):
+        """Records a prompt (and the game data it was built from), returns its call id."""
+        call_id = uuid.uuid4().hex[:12]
+        self.record('call', call_id=call_id, call_kind=call_kind, session=session, prompt=prompt, game_data=game_data)
+        return call_id
+
+    def flush(self):
+        """Blocks until every queued record is written."""
+        self._queue.join()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="debug-capture", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < 500:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch):
+        try:
+            with gzip.open(self._current_path(), "at", encoding="utf-8") as f:
+                for record in batch:
+                    f.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+        except Exception as e:
+            print(f"DEBUG ERROR: Could not write capture: {e}", flush=True)
+
+    def _current_path(self):
+        expired = time.time() - self._opened > self.max_age
+        # A file (or ./prompt) deleted by hand is simply replaced by a new one
+        missing = self._path is None or not os.path.exists(self._path)
+        if missing or expired or os.path.getsize(self._path) >= self.max_bytes:
+            os.makedirs(self.directory, exist_ok=True)
+            self._sequence += 1
+            name = f"session_{time.strftime('%Y%m%d_%H%M%S')}_{self._sequence:03d}.jsonl.gz"
+            self._path = os.path.join(self.directory, name)
+            self._opened = time.time()
+            self._cleanup()
+            print(f"DEBUG: Capturing to {self._path}", flush=True)
+        return self._path
+
+    def _cleanup(self):
+        files = capture_files(self.directory)
+        now = time.time()
+        for index, path in enumerate(files):
+            too_many = index < len(files) - self.max_files
+            if path != self._path and (too_many or now - os.path.getmtime(path) > self.retention):
+                os.remove(path)
+
+def capture_files(path):
+    """Capture files of a directory (oldest first), or the file itself."""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "session_*.jsonl.gz")))
+    return [path]
+
+def read_capture(path):
+    """Yields the records of a capture file or directory, in order."""
+    for file in capture_files(path):
+        try:
+            with gzip.open(file, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except EOFError:
+            # File still being written, or cut short by a crash
+            continue
+
+def export_call(path, call_id):
+    """Prompt, game data and response of one AI call: {'call': ..., 'response': ...}."""
+    found = {}
+    for record in read_capture(path):
+        if record.get('call_id') == call_id and record['kind'] in ('call', 'response'):
+            found[record['kind']] = record
+    return found
+
+def to_recording(path, out_path, session=None, game=0):
+    """Writes captured snapshots of one game as a nexus.replay recording, returns the snapshot count."""
+    events = []
+    started = None
+    last_game_time = None
+    current_game = 0
+    count = 0
+
+    with gzip.open(out_path, "wt", encoding="utf-8") as out:
+        for record in read_capture(path):
+            if record['kind'] != 'snapshot' or (session and record.get('session') != session):
+                continue
+            data = record['data']
+            game_time = data.get('gameData', {}).get('gameTime', 0)
+            if last_game_time is not None and game_time < last_game_time:
+                current_game += 1
+                events = []
+                started = None
+            last_game_time = game_time
+            if current_game != game:
+                continue
+
+            # allgamedata carries every event since the start of the game
+            events.extend(data.get('new_events', []))
+            started = record['t'] if started is None else started
+            snapshot = {
+                'activePlayer': data.get('activePlayer', {}),
+                'allPlayers': data.get('allPlayers', []),
+                'events': {'Events': list(events)},
+                'gameData': data.get('gameData', {}),
+            }
+            out.write(json.dumps({'t': round(record['t'] - started, 3), 'data': snapshot}) + "\n")
+            count += 1
+    return count
+
+def _list_calls(path):
+    responses = {}
+    calls = []
+    for record in read_capture(path):
+        if record['kind'] == 'call':
+            calls.append(record)
+        elif record['kind'] == 'response':
+            responses[record['call_id']] = record
+    for call in calls:
+        response = responses.get(call['call_id'], {})
+        when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(call['t']))
+        print(f"{call['call_id']}  {when}  {call.get('session') or '-':<10} {call['call_kind']:<9} "
+              f"{len(call['prompt']):>6} chars  {response.get('outcome', '?'):<9} {response.get('seconds', '?')}s")
+
+def _export(path, call_id, out_dir):
+    found = export_call(path, call_id)
+    if 'call' not in found:
+        raise SystemExit(f"Call {call_id} not found in {path}")
+    call, response = found['call'], found.get('response', {})
+    if not out_dir:
+        print(json.dumps({'call': call, 'response': response}, indent=2, ensure_ascii=False))
+        return
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, f"prompt_{call_id}.txt"), "w", encoding="utf-8") as f:
+        f.write(call['prompt'])
+    with open(os.path.join(out_dir, f"game_data_{call_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(call.get('game_data'), f, indent=4, ensure_ascii=False)
+    with open(os.path.join(out_dir, f"response_{call_id}.html"), "w", encoding="utf-8") as f:
+        f.write(response.get('text', ''))
+    print(f"Exported call {call_id} to {out_dir}", flush=True)
+
+# Singleton
+debug_capture = DebugCapture(
+    Config.DEBUG_CAPTURE_DIR,
+    Config.DEBUG_CAPTURE_MAX_BYTES,
+    Config.DEBUG_CAPTURE_MAX_AGE,
+    Config.DEBUG_CAPTURE_MAX_FILES,
+    Config.DEBUG_CAPTURE_RETENTION,
+)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["list", "export", "replay"])
+    parser.add_argument("capture", help="Capture file or directory")
+    parser.add_argument("target", nargs="?", help="export: call id, replay: output recording")
+    parser.add_argument("--out", help="export: directory for the prompt, game data and response files")
+    parser.add_argument("--session", help="replay: session name")
+    parser.add_argument("--game", type=int, default=0, help="replay: index of the game in the capture")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        _list_calls(args.capture)
+    elif not args.target:
+        parser.error(f"{args.command} needs a target")
+    elif args.command == "export":
+        _export(args.capture, args.target, args.out)
+    else:
+        count = to_recording(args.capture, args.target, args.session, args.game)
+        print(f"Wrote {count} snapshots to {args.target}", flush=True)
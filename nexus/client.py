@@ -0,0 +1,76 @@
+import os
+import time
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from . import metrics
+from .config import Config
+from .utils import get_windows_host_ip
+
+# Disable SSL warnings
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+class ApiNotReady(Exception):
+    """The Live Client API answered, but not with game data yet (loading screen)."""
+
+def resolve_target_ip():
+    target_ip = Config.WINDOWS_HOST
+
+    if not target_ip and "microsoft" in os.uname().release.lower():
+        print("WSL2 detected. Attempting to find Windows host IP...", flush=True)
+        target_ip = get_windows_host_ip()
+        print(f"Targeting Windows Host at: {target_ip}", flush=True)
+
+    return target_ip or "127.0.0.1"
+
+class LiveClient:
+    """
+    Keep-alive HTTP client for the Live Client Data API.
+
+    Every watcher request goes through one pooled `requests.Session`, so the TCP
+    connection and TLS session to port 2999 are set up once and then reused
+    instead of being renegotiated on every poll. Per-endpoint latency is
+    measured to check it.
+    """
+
+    def __init__(self, target_ip, port=None):
+        self.target_ip = target_ip
+        self.base_url = f"https://{target_ip}:{port or Config.LOL_API_PORT}/liveclientdata"
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=Config.LIVE_CLIENT_POOL_SIZE, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.latency = {}
+
+    def get_json(self, path, connect_timeout=None):
+        timeout = (connect_timeout or Config.LIVE_CLIENT_CONNECT_TIMEOUT, Config.LIVE_CLIENT_READ_TIMEOUT)
+        started = time.perf_counter()
+        # verify is passed per request: a Session-level False loses to REQUESTS_CA_BUNDLE
+        response = self.session.get(f"{self.base_url}/{path}", verify=False, timeout=timeout)
+        elapsed = time.perf_counter() - started
+        endpoint = path.split('?')[0]
+        self._record(endpoint, elapsed)
+        metrics.POLL_REQUEST_SECONDS.labels(endpoint=endpoint).observe(elapsed)
+        metrics.POLL_PAYLOAD_BYTES.labels(endpoint=endpoint).observe(len(response.content))
+
+        if response.status_code != 200:
+            raise ApiNotReady(response.status_code)
+        return response.json()
+
+    def _record(self, endpoint, elapsed):
+        stats = self.latency.setdefault(endpoint, {'count': 0, 'total': 0.0, 'last': 0.0, 'max': 0.0})
+        stats['count'] += 1
+        stats['total'] += elapsed
+        stats['last'] = elapsed
+        stats['max'] = max(stats['max'], elapsed)
+
+    def latency_report(self):
+        """Per-endpoint request latency in milliseconds."""
+        return {
+            endpoint: {
+                'count': stats['count'],
+                'last_ms': round(stats['last'] * 1000, 1),
+                'avg_ms': round(stats['total'] / stats['count'] * 1000, 1),
+                'max_ms': round(stats['max'] * 1000, 1),
+            }
+            for endpoint, stats in list(self.latency.items())
+        }
@@ -7,10 +7,75 @@ load_dotenv()
 class Config:
     GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
     GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.0-flash")
+    GEMINI_FAKE = os.environ.get("GEMINI_FAKE") == "1" # Offline stand-in (see FakeBackend in nexus/llm.py)
+    GEMINI_HEDGE_MODEL = os.environ.get("GEMINI_HEDGE_MODEL", "gemini-2.0-flash-lite") # Empty to disable hedging
     WINDOWS_HOST = os.environ.get("WINDOWS_HOST")
     
     # Constants
-    POLL_INTERVAL_FAST = 2
-    POLL_INTERVAL_SLOW = 10
-    AI_UPDATE_INTERVAL = 120
+    # Refresh interval of each Live Client sub-endpoint while in game (seconds)
+    POLL_INTERVALS = {
+        'gamestats': 2,
+        'eventdata': 2,
+        'activeplayer': 4,
+        'playerlist': 6,
+    }
+    # Out of game: gamestats probe with exponential backoff (seconds)
+    OFFLINE_BACKOFF_MIN = 1
+    OFFLINE_BACKOFF_MAX = 5
+    PROBE_TIMEOUT = 0.5
+    # Keep-alive Live Client session (seconds)
+    LIVE_CLIENT_CONNECT_TIMEOUT = 1.0
+    LIVE_CLIENT_READ_TIMEOUT = 2.0
+    LIVE_CLIENT_POOL_SIZE = 2
+    AI_UPDATE_INTERVAL = 120 # Periodic refresh when nothing significant happens (only if the game changed)
+    AI_REQUEST_TIMEOUT = 30 # Per attempt, and max silence once an answer streams
+    # LLM backend resilience (see ResilientBackend)
+    AI_FIRST_CHUNK_TIMEOUT = 20 # Give up if no attempt starts answering
+    AI_HEDGE_AFTER = 4.0 # Send the prompt to GEMINI_HEDGE_MODEL too if the primary is still silent
+    AI_RETRIES = 2
+    AI_RETRY_BACKOFF = 1.0 # Doubled on each retry, with jitter
+
+    # Event-driven advice scheduling (see AdviceScheduler)
+    ADVICE_TRIGGER_SCORE = 3 # e.g. one dragon, or the death of the active player
+    ADVICE_DEBOUNCE = 8 # Wait for a burst of events (teamfight) to settle
+    ADVICE_MIN_SPACING = 40
+    ADVICE_RATE_LIMIT = 8 # Calls per ADVICE_RATE_WINDOW
+    ADVICE_RATE_WINDOW = 600
+    ADVICE_GOLD_SWING = 1500 # Change of the team item-value difference since the last advice
+
+    PROMPT_TOKEN_BUDGET = 1500 # Hard cap of the tactical prompt (estimated tokens)
+    GOLD_TREND_POINTS = 5 # Timeline samples of the team gold lead shown in the prompt
+
+    # Background per-phase summaries reduced into the post-game report (see PhaseSummarizer)
+    PHASE_SUMMARY_INTERVAL = 300 # Seconds of game time folded into the phase summary at once
+    PHASE_SUMMARY_MAX_CHARS = 600
+
+    # Finished games, for cross-game trends (see MatchStore)
+    HISTORY_DB_PATH = os.path.join("cache", "history.sqlite3")
+    HISTORY_QUEUE_SIZE = 100
+    HISTORY_CS_AT = 600 # Game time of the "CS at 10 minutes" stat
+
+    # Early-game plans cached by matchup
+    ADVICE_CACHE_PATH = os.path.join("cache", "early_game.json")
+    ADVICE_CACHE_SIZE = 500
+    ADVICE_CACHE_TTL = 14 * 24 * 3600 # Plans age with patches
+    ADVICE_CACHE_NEAR_MATCH = True # Reuse a plan with the same champion, position and opponent
     LOL_API_PORT = 2999
+
+    # Multi-session: "name=host[:port],..." (default: one session on WINDOWS_HOST or the detected host)
+    SESSIONS = os.environ.get("NEXUS_SESSIONS", "")
+    POLLER_POOL_SIZE = 4 # Threads polling the Live Client API of every session
+    AI_POOL_SIZE = 8 # Threads running AI calls for every session
+    SESSION_AI_CONCURRENCY = 2 # AI calls of one session at once (advice + phase summary)
+    EVENT_WINDOW = 120 # Events sent to the AI (seconds of game time)
+    EVENT_LOG_RETENTION = 1800 # Events kept in memory (seconds of game time)
+    TIMELINE_INTERVAL = 30 # Post-game timeline sampling (seconds of game time)
+    TIMELINE_CAPACITY = 240 # Samples kept: 2 hours at 30s
+    SSE_KEEPALIVE = 15
+
+    # Debug mode capture (see DebugCapture)
+    DEBUG_CAPTURE_DIR = "prompt"
+    DEBUG_CAPTURE_MAX_BYTES = 20 * 1024 * 1024 # Compressed size before rotating to a new file
+    DEBUG_CAPTURE_MAX_AGE = 3600
+    DEBUG_CAPTURE_MAX_FILES = 20
+    DEBUG_CAPTURE_RETENTION = 7 * 24 * 3600
@@ -0,0 +1,55 @@
+import bisect
+
+class EventLog:
+    """
+    In-memory log of Live Client events, ordered by EventTime.
+
+    Events are ingested incrementally: `next_event_id` is the cursor to pass to
+    /liveclientdata/eventdata?eventID=N, so only new events are downloaded.
+    The log only retains `retention` seconds of game time, and time windows
+    are resolved with a binary search instead of a rescan of the history.
+    """
+
+    def __init__(self, retention):
+        self.retention = retention
+        self.reset()
+
+    def reset(self):
+        self._times = []
+        self._events = []
+        self.next_event_id = 0
+
+    def extend(self, events):
+        """Adds new events (already seen EventIDs are ignored) and returns the ones added."""
+        added = []
+        for event in events:
+            event_id = event.get('EventID', -1)
+            if event_id < self.next_event_id:
+                continue
+            self.next_event_id = event_id + 1
+
+            event_time = event.get('EventTime', 0)
+            index = bisect.bisect_right(self._times, event_time)
+            self._times.insert(index, event_time)
+            self._events.insert(index, event)
+            added.append(event)
+        return added
+
+    def since(self, game_time):
+        """Events strictly after `game_time`."""
+        return self._events[bisect.bisect_right(self._times, game_time):]
+
+    def window(self, current_time, seconds):
+        return self.since(current_time - seconds)
+
+    def trim(self, current_time):
+        index = bisect.bisect_right(self._times, current_time - self.retention)
+        if index:
+            del self._times[:index]
+            del self._events[:index]
+
+    def all(self):
+        return list(self._events)
+
+    def __len__(self):
+        return len(self._events)
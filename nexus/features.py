@@ -0,0 +1,148 @@
+import json
+import os
+from .utils import format_gametime
+
+ITEMS_PATH = os.path.join(os.path.dirname(__file__), "data", "items.json")
+
+POSITIONS = ('TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY')
+STATS = ('gold', 'level', 'cs', 'kills', 'deaths', 'assists')
+
+# Objectives counted per team: event -> column
+OBJECTIVES = {
+    'DragonKill': 'dragons',
+    'HeraldKill': 'heralds',
+    'BaronKill': 'barons',
+    'HordeKill': 'grubs',
+    'TurretKilled': 'towers',
+    'InhibKilled': 'inhibs',
+}
+OBJECTIVE_LABELS = {
+    'dragons': "dragons", 'heralds': "hérauts", 'barons': "barons",
+    'grubs': "larves", 'towers': "tours", 'inhibs': "inhibiteurs",
+}
+# Structures are named after the team owning them (Turret_T1_..., Barracks_T2_...)
+STRUCTURE_OWNERS = {'_T1_': 'ORDER', '_T2_': 'CHAOS'}
+
+def load_item_costs(path=ITEMS_PATH):
+    """Item id -> total gold cost, from the table bundled with the package."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            items = json.load(f)['items']
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Could not load item table {path}: {e}", flush=True)
+        return {}
+    return {int(item_id): item['gold'] for item_id, item in items.items()}
+
+# Loaded once: no network call on the polling path
+ITEM_COSTS = load_item_costs()
+
+def item_value(items):
+    """
+    Gold value of an inventory. The Live Client API `price` is only the cost of
+    the last combine step; it is kept as a fallback for items missing from the table.
+    """
+    return sum(
+        ITEM_COSTS.get(item.get('itemID', item.get('id')), item.get('price', 0)) * item.get('count', 1)
+        for item in items
+    )
+
+def _objective_team(event, teams_by_name):
+    """Team credited with an objective event, or None."""
+    structure = event.get('TurretKilled') or event.get('InhibKilled')
+    if structure:
+        owner = next((team for tag, team in STRUCTURE_OWNERS.items() if tag in structure), None)
+        return None if owner is None else ('CHAOS' if owner == 'ORDER' else 'ORDER')
+    return teams_by_name.get(event.get('KillerName'))
+
+def compute_features(game_data, my_team, events=(), timeline=None, trend_points=5):
+    """
+    Team and lane aggregates derived from the raw game data, for the prompt.
+
+    All ten players are read in a single pass that fills one column per stat
+    and the per-team totals at once; lanes and objectives are then resolved
+    from indexes built during that pass instead of scanning the players again.
+    The gold lead trend comes from the timeline samples when one is given.
+    """
+    players = game_data.get('allPlayers', [])
+    columns = {stat: [] for stat in STATS}
+    totals = {}
+    lanes = {}
+    teams_by_name = {}
+
+    for index, p in enumerate(players):
+        scores = p.get('scores', {})
+        team = p.get('team', '')
+        values = (
+            item_value(p.get('items', [])),
+            p.get('level', 0),
+            scores.get('creepScore', 0),
+            scores.get('kills', 0),
+            scores.get('deaths', 0),
+            scores.get('assists', 0),
+        )
+        team_totals = totals.setdefault(team, dict.fromkeys(STATS + tuple(OBJECTIVES.values()), 0))
+        for stat, value in zip(STATS, values):
+            columns[stat].append(value)
+            team_totals[stat] += value
+        if p.get('position') in POSITIONS:
+            lanes.setdefault(p['position'], {})[team == my_team] = index
+        for key in ('summonerName', 'riotIdGameName', 'riotId'):
+            if p.get(key):
+                teams_by_name[p[key]] = team
+
+    for event in events:
+        column = OBJECTIVES.get(event.get('EventName'))
+        team = _objective_team(event, teams_by_name) if column else None
+        if team in totals:
+            totals[team][column] += 1
+
+    enemy_team = next((team for team in totals if team != my_team), None)
+    lane_rows = []
+    for position in POSITIONS:
+        ally, enemy = lanes.get(position, {}).get(True), lanes.get(position, {}).get(False)
+        if ally is None or enemy is None:
+            continue
+        lane_rows.append({
+            'position': position,
+            'ally': players[ally].get('championName', '?'),
+            'enemy': players[enemy].get('championName', '?'),
+            **{stat: columns[stat][ally] - columns[stat][enemy] for stat in ('gold', 'level', 'cs')},
+        })
+
+    return {
+        'my_team': my_team,
+        'enemy_team': enemy_team,
+        'totals': totals,
+        'lanes': lane_rows,
+        'gold_trend': timeline.gold_lead(my_team, trend_points) if timeline is not None and my_team else [],
+    }
+
+def format_features(features):
+    """Compact table of the derived numbers (allies first, differences signed)."""
+    ally = features['totals'].get(features['my_team'])
+    enemy = features['totals'].get(features['enemy_team'])
+    if not ally or not enemy:
+        return "Indisponible."
+
+    def versus(stat):
+        return f"{ally[stat]} vs {enemy[stat]} ({ally[stat] - enemy[stat]:+d})"
+
+    def kda(totals):
+        return "/".join(str(totals[k]) for k in ('kills', 'deaths', 'assists'))
+
+    lines = [
+        f"Or (items): {versus('gold')} | niveaux: {versus('level')} | cs: {versus('cs')}",
+        f"KDA: {kda(ally)} vs {kda(enemy)}",
+        "Objectifs: " + ", ".join(f"{label} {ally[column]}-{enemy[column]}" for column, label in OBJECTIVE_LABELS.items()),
+    ]
+    if features['gold_trend']:
+        lines.append("Tendance écart d'or: " + ", ".join(
+            f"{format_gametime(t)} {lead:+d}" for t, lead in features['gold_trend']
+        ))
+    if features['lanes']:
+        lines.append("Lanes (or, niv, cs):")
+        lines.extend(
+            f"{lane['position']} {lane['ally']} vs {lane['enemy']}: {lane['gold']:+d}, {lane['level']:+d}, {lane['cs']:+d}"
+            for lane in features['lanes']
+        )
+    return "\n".join(lines)
@@ -0,0 +1,263 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from .config import Config
+from .features import compute_features
+from .utils import project_game_data
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    game_id TEXT UNIQUE NOT NULL,
+    session TEXT NOT NULL,
+    played_at REAL NOT NULL,
+    game_mode TEXT,
+    duration REAL,
+    champion TEXT,
+    role TEXT,
+    opponent TEXT,
+    win INTEGER,
+    kills INTEGER,
+    deaths INTEGER,
+    assists INTEGER,
+    cs INTEGER,
+    cs_at_10 INTEGER,
+    gold_diff INTEGER,
+    lane_gold_diff INTEGER,
+    end_state TEXT,
+    timeline TEXT,
+    advice TEXT,
+    report TEXT
+);
+CREATE INDEX IF NOT EXISTS games_champion ON games (champion, played_at);
+CREATE INDEX IF NOT EXISTS games_role ON games (role, played_at);
+CREATE INDEX IF NOT EXISTS games_opponent ON games (opponent, champion);
+CREATE INDEX IF NOT EXISTS games_played_at ON games (played_at);
+"""
+
+# Columns of the listings (the JSON blobs are only read by game())
+SUMMARY_COLUMNS = (
+    "game_id, session, played_at, game_mode, duration, champion, role, opponent, win, "
+    "kills, deaths, assists, cs, cs_at_10, gold_diff, lane_gold_diff"
+)
+AGGREGATES = (
+    "COUNT(*) AS games, SUM(win) AS wins, AVG(win) AS win_rate, AVG(cs_at_10) AS cs_at_10, "
+    "AVG(gold_diff) AS gold_diff, AVG(lane_gold_diff) AS lane_gold_diff"
+)
+
+def build_record(game_data, timeline, advice):
+    """Row of a finished game from its last raw game data, its timeline and its advice."""
+    players = game_data.get('allPlayers', [])
+    active_name = game_data.get('activePlayer', {}).get('summonerName')
+    me = next((p for p in players if p.get('summonerName') == active_name), {})
+    my_team, role = me.get('team'), me.get('position') or None
+    opponent = next(
+        (p.get('championName') for p in players if role and p.get('team') != my_team and p.get('position') == role),
+        None,
+    )
+
+    features = compute_features(game_data, my_team, timeline.events)
+    ally = features['totals'].get(my_team)
+    enemy = features['totals'].get(features['enemy_team'])
+    lane = next((lane for lane in features['lanes'] if lane['position'] == role), None)
+    result = next((e.get('Result') for e in reversed(timeline.events) if e.get('EventName') == 'GameEnd'), None)
+    scores = me.get('scores', {})
+    duration = game_data.get('gameData', {}).get('gameTime') or 0
+    end_state = project_game_data({k: v for k, v in game_data.items() if k != 'events'})
+
+    return {
+        'game_mode': game_data.get('gameData', {}).get('gameMode'),
+        'duration': duration,
+        'champion': me.get('championName'),
+        'role': role,
+        'opponent': opponent,
+        'win': None if result is None else int(result == 'Win'),
+        'kills': scores.get('kills'),
+        'deaths': scores.get('deaths'),
+        'assists': scores.get('assists'),
+        'cs': scores.get('creepScore'),
+        'cs_at_10': timeline.value_at(me.get('championName'), 'cs', Config.HISTORY_CS_AT)
+                    if duration >= Config.HISTORY_CS_AT else None,
+        'gold_diff': ally['gold'] - enemy['gold'] if ally and enemy else None,
+        'lane_gold_diff': lane['gold'] if lane else None,
+        'end_state': json.dumps(end_state, ensure_ascii=False),
+        'timeline': json.dumps(timeline.export(), ensure_ascii=False),
+        'advice': json.dumps(advice, ensure_ascii=False),
+    }
+
+class MatchStore:
+    """
+    SQLite history of the finished games of every session, for cross-game trends.
+
+    `save()` only queues the game: a background thread builds its record (end
+    stats, features, timeline) and writes it, so the polling thread never waits
+    on the disk. Queries open their own connection; WAL mode lets them read
+    while the writer commits.
+    """
+
+    def __init__(self, path, queue_size=100):
+        self.path = path
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    def save(self, session, game_data, timeline, advice):
+        """Queues a finished game; returns its id (to attach the post-game report later)."""
+        game_id = uuid.uuid4().hex[:12]
+        self._put(('game', game_id, session, time.time(), game_data, timeline, list(advice)))
+        return game_id
+
+    def save_report(self, game_id, report):
+        self._put(('report', game_id, report))
+
+    def flush(self):
+        """Blocks until every queued write is done."""
+        self._queue.join()
+
+    def _put(self, job):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            print(f"History: write queue full, {job[0]} of game {job[1]} dropped", flush=True)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="match-history", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        connection = None
+        while True:
+            job = self._queue.get()
+            try:
+                connection = connection or self._connect()
+                with connection:
+                    self._write(connection, job)
+            except Exception as e:
+                print(f"History Error: Could not save {job[0]} of game {job[1]}: {e}", flush=True)
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _write(connection, job):
+        if job[0] == 'report':
+            _, game_id, report = job
+            connection.execute("UPDATE games SET report = ? WHERE game_id = ?", (report, game_id))
+            return
+
+        _, game_id, session, played_at, game_data, timeline, advice = job
+        record = {'game_id': game_id, 'session': session, 'played_at': played_at,
+                  **build_record(game_data, timeline, advice)}
+        columns = ", ".join(record)
+        placeholders = ", ".join(f":{column}" for column in record)
+        connection.execute(f"INSERT INTO games ({columns}) VALUES ({placeholders})", record)
+        print(f"History: saved game {game_id} ({record['champion']} vs {record['opponent'] or '?'})", flush=True)
+
+    def _connect(self):
+        if not self._schema_ready:
+            with self._lock:
+                if not self._schema_ready:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    with closing(sqlite3.connect(self.path, timeout=5)) as connection:
+                        connection.execute("PRAGMA journal_mode=WAL")
+                        connection.executescript(SCHEMA)
+                    self._schema_ready = True
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _query(self, sql, params=()):
+        with closing(self._connect()) as connection:
+            return [dict(row) for row in connection.execute(sql, params)]
+
+    @staticmethod
+    def _where(**filters):
+        clauses = []
+        params = []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if column == 'since':
+                clauses.append("played_at >= ?")
+            else:
+                clauses.append(f"{column} = ?")
+            params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def stats(self, champion=None, role=None, opponent=None, since=None):
+        """Aggregates over the matching games: count, wins, win rate, average CS at 10 and gold diffs."""
+        where, params = self._where(champion=champion, role=role, opponent=opponent, since=since)
+        return self._query(f"SELECT {AGGREGATES} FROM games{where}", params)[0]
+
+    def champions(self, role=None, since=None):
+        """Aggregates per champion and role, most played first."""
+        where, params = self._where(role=role, since=since)
+        return self._query(
+            f"SELECT champion, role, {AGGREGATES} FROM games{where} "
+            "GROUP BY champion, role ORDER BY games DESC, champion", params,
+        )
+
+    def matchups(self, champion=None, role=None, since=None, limit=50):
+        """Aggregates per champion and direct opponent, most played first."""
+        where, params = self._where(champion=champion, role=role, since=since)
+        where += (" AND" if where else " WHERE") + " opponent IS NOT NULL"
+        return self._query(
+            f"SELECT champion, opponent, {AGGREGATES} FROM games{where} "
+            "GROUP BY champion, opponent ORDER BY games DESC, champion LIMIT ?", params + [limit],
+        )
+
+    def recent(self, champion=None, role=None, opponent=None, limit=20):
+        where, params = self._where(champion=champion, role=role, opponent=opponent)
+        return self._query(
+            f"SELECT {SUMMARY_COLUMNS} FROM games{where} ORDER BY played_at DESC LIMIT ?", params + [limit],
+        )
+
+    def game(self, game_id):
+        """Everything saved for one game (end state, timeline and advice decoded), or None."""
+        rows = self._query("SELECT * FROM games WHERE game_id = ?", (game_id,))
+        if not rows:
+            return None
+        game = rows[0]
+        for column in ('end_state', 'timeline', 'advice'):
+            game[column] = json.loads(game[column]) if game[column] else None
+        return game
+
+    def early_game_context(self, champion, role, opponent):
+        """Past results on this champion and matchup, for the early-game prompt ("" without history)."""
+        try:
+            role = role or None
+            overall = self.stats(champion=champion, role=role)
+            matchup = self.stats(champion=champion, opponent=opponent) if opponent else None
+        except sqlite3.Error as e:
+            print(f"History Error: {e}", flush=True)
+            return ""
+
+        lines = []
+        if overall['games']:
+            lines.append(f"{champion}{' ' + role if role else ''}: {format_stats(overall, 'gold_diff')} (écart d'or équipe)")
+        if matchup and matchup['games']:
+            lines.append(f"vs {opponent}: {format_stats(matchup, 'lane_gold_diff')} (écart d'or lane)")
+        return "\n".join(lines)
+
+def format_stats(stats, gold_column):
+    """"12 parties, 58% de victoires, CS@10 moy. 71, +350" (unknown values are skipped)."""
+    parts = [f"{stats['games']} partie{'s' if stats['games'] > 1 else ''}"]
+    if stats['win_rate'] is not None:
+        parts.append(f"{stats['win_rate']:.0%} de victoires")
+    if stats['cs_at_10'] is not None:
+        parts.append(f"CS@10 moy. {stats['cs_at_10']:.0f}")
+    if stats[gold_column] is not None:
+        parts.append(f"{stats[gold_column]:+.0f} or moy.")
+    return ", ".join(parts)
+
+# Singleton
+match_store = MatchStore(Config.HISTORY_DB_PATH, Config.HISTORY_QUEUE_SIZE)
@@ -0,0 +1,222 @@
+import itertools
+import queue
+import random
+import threading
+import time
+import google.generativeai as genai
+from . import metrics
+from .config import Config
+
+class LLMBackend:
+    """Text generation backend used by AI: streams the answer to a prompt."""
+
+    name = "backend"
+
+    def stream(self, prompt, timeout=None):
+        """Yields the answer chunk by chunk (text)."""
+        raise NotImplementedError
+
+    def generate(self, prompt, timeout=None):
+        return "".join(self.stream(prompt, timeout))
+
+class GeminiBackend(LLMBackend):
+    def __init__(self, model_name, api_key):
+        genai.configure(api_key=api_key)
+        self.name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    def stream(self, prompt, timeout=None):
+        response = self.model.generate_content(
+            prompt, stream=True, request_options={"timeout": timeout or Config.AI_REQUEST_TIMEOUT}
+        )
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunk without text parts (e.g. finish reason only)
+                continue
+            if text:
+                yield text
+
+class FakeBackend(LLMBackend):
+    """
+    In-process stand-in: streams a canned HTML answer after a scripted latency
+    and records each call, for offline runs and benchmarks.
+
+    `script` is cycled over the calls: a number is the delay before the first
+    chunk (seconds), an exception is raised instead of answering.
+    """
+
+    ANSWER = (
+        "<h3>📊 Analyse Actuelle</h3><ul><li>Réponse simulée (mode hors ligne).</li></ul>"
+        "<h3>⚡ Plan pour les 2 prochaines minutes</h3><ul><li><strong>Action</strong>: Farmer.</li></ul>"
+    )
+
+    def __init__(self, script=(0.8,), chunk_delay=0.05, chunk_size=24, name="fake"):
+        self.script = script
+        self.chunk_delay = chunk_delay
+        self.chunk_size = chunk_size
+        self.name = name
+        self.calls = []
+        self._steps = itertools.cycle(script)
+        self._lock = threading.Lock()
+
+    def stream(self, prompt, timeout=None):
+        with self._lock:
+            step = next(self._steps)
+            call = {'prompt_chars': len(prompt), 'started': time.perf_counter(), 'first_chunk': None, 'finished': None}
+            self.calls.append(call)
+        return self._chunks(call, step, timeout)
+
+    def _chunks(self, call, step, timeout):
+        if isinstance(step, Exception):
+            raise step
+        if timeout is not None and step > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"{self.name}: no answer after {timeout}s")
+
+        time.sleep(step)
+        call['first_chunk'] = time.perf_counter()
+        for i in range(0, len(self.ANSWER), self.chunk_size):
+            if i:
+                time.sleep(self.chunk_delay)
+            yield self.ANSWER[i:i + self.chunk_size]
+        call['finished'] = time.perf_counter()
+
+class ResilientBackend(LLMBackend):
+    """
+    Wraps a primary backend with timeouts, retries and a hedged request.
+
+    Every attempt runs on its own thread and streams into a queue. If the
+    primary has not sent its first chunk after `hedge_after` seconds, the same
+    prompt is sent to `hedge` (a faster model) and the first attempt to answer
+    wins; the other one is abandoned. A primary failing before its first chunk
+    falls back to `hedge` at once. Once both failed, the primary is retried up
+    to `retries` times with jittered exponential backoff, and TimeoutError is
+    raised when no answer starts within `first_chunk_timeout`.
+    A failure after the first chunk is not retried (the answer is already on screen).
+    """
+
+    def __init__(self, primary, hedge=None, hedge_after=None, retries=0, backoff=1.0,
+                 first_chunk_timeout=None, request_timeout=None):
+        self.primary = primary
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.retries = retries
+        self.backoff = backoff
+        self.first_chunk_timeout = first_chunk_timeout
+        self.request_timeout = request_timeout
+        self.name = primary.name
+
+    def stream(self, prompt, timeout=None):
+        timeout = timeout or self.request_timeout
+        events = queue.Queue()
+        stop = threading.Event()
+        ids = itertools.count()
+        started = time.monotonic()
+        deadline = started + self.first_chunk_timeout if self.first_chunk_timeout else None
+        hedge_at = started + self.hedge_after if self.hedge and self.hedge_after else None
+        retry_at = None
+        retries = 0
+        hedged = False
+        running = {}
+
+        def launch(backend):
+            attempt = next(ids)
+            running[attempt] = backend
+            threading.Thread(
+                target=self._run, args=(backend, prompt, timeout, attempt, events, stop),
+                name=f"llm-{backend.name}", daemon=True,
+            ).start()
+
+        launch(self.primary)
+        try:
+            # Wait for the first attempt to start answering
+            while True:
+                wakeups = [t for t in (deadline, hedge_at, retry_at) if t is not None]
+                wait = max(0.0, min(wakeups) - time.monotonic()) if wakeups else None
+                try:
+                    attempt, kind, payload = events.get(timeout=wait)
+                except queue.Empty:
+                    now = time.monotonic()
+                    if deadline is not None and now >= deadline:
+                        raise TimeoutError(f"No answer from {self.name} after {self.first_chunk_timeout}s")
+                    if hedge_at is not None and now >= hedge_at:
+                        hedge_at, hedged = None, True
+                        print(f"LLM: {self.primary.name} slow, hedging with {self.hedge.name}", flush=True)
+                        metrics.LLM_HEDGES.inc()
+                        launch(self.hedge)
+                    if retry_at is not None and now >= retry_at:
+                        retry_at = None
+                        metrics.LLM_RETRIES.inc()
+                        launch(self.primary)
+                    continue
+
+                if kind != 'error':
+                    break
+                backend = running.pop(attempt)
+                print(f"LLM: {backend.name} failed: {payload}", flush=True)
+                if running or retry_at is not None:
+                    continue
+                if self.hedge and not hedged:
+                    # The primary failed outright (quota, unavailable...): fall back at once
+                    hedge_at, hedged = None, True
+                    print(f"LLM: falling back to {self.hedge.name}", flush=True)
+                    metrics.LLM_HEDGES.inc()
+                    launch(self.hedge)
+                    continue
+                if retries >= self.retries:
+                    raise payload
+                retry_at = time.monotonic() + self.backoff * 2 ** retries * random.uniform(0.5, 1.5)
+                retries += 1
+
+            winner = attempt
+            winner_name = running[winner].name
+            if winner_name != self.primary.name:
+                print(f"LLM: answered by {winner_name}", flush=True)
+
+            # Then follow the winner only
+            while True:
+                if attempt == winner:
+                    if kind == 'end':
+                        return
+                    if kind == 'error':
+                        raise payload
+                    yield payload
+                try:
+                    attempt, kind, payload = events.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"{winner_name} stalled for {timeout}s")
+        finally:
+            stop.set()
+
+    @staticmethod
+    def _run(backend, prompt, timeout, attempt, events, stop):
+        try:
+            for chunk in backend.stream(prompt, timeout):
+                if stop.is_set():
+                    return
+                events.put((attempt, 'chunk', chunk))
+            events.put((attempt, 'end', None))
+        except Exception as e:
+            events.put((attempt, 'error', e))
+
+def create_backend(model_name, api_key):
+    """Backend configured from Config, or None when no model is available."""
+    if Config.GEMINI_FAKE:
+        primary, hedge = FakeBackend(), None
+    elif api_key:
+        primary = GeminiBackend(model_name, api_key)
+        hedge_model = Config.GEMINI_HEDGE_MODEL
+        hedge = GeminiBackend(hedge_model, api_key) if hedge_model and hedge_model != model_name else None
+    else:
+        return None
+
+    return ResilientBackend(
+        primary, hedge,
+        hedge_after=Config.AI_HEDGE_AFTER,
+        retries=Config.AI_RETRIES,
+        backoff=Config.AI_RETRY_BACKOFF,
+        first_chunk_timeout=Config.AI_FIRST_CHUNK_TIMEOUT,
+        request_timeout=Config.AI_REQUEST_TIMEOUT,
+    )
@@ -0,0 +1,182 @@
+import bisect
+import math
+import threading
+import time
+
+REGISTRY = []
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 12.0, 20.0, 30.0, 60.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+SIZE_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+class _Metric:
+    """
+    Base of the Prometheus-style metrics: one child per label values.
+
+    Children are created once and cached, and each update is a short critical
+    section on the child's own lock, so instrumentation can stay on in production.
+    """
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self.labels()
+        REGISTRY.append(self)
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _unlabelled(self):
+        return self.labels()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for key, child in sorted(self._children.items()):
+            labels = dict(zip(self.labelnames, key))
+            lines.extend(child.render(self.name, labels))
+        return lines
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = (
+        f'{name}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(pairs) + "}"
+
+def _format_value(value):
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class _ValueChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def set(self, value):
+        self._value = value
+
+    def render(self, name, labels):
+        return [f"{name}{_format_labels(labels)} {_format_value(self._value)}"]
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount=1):
+        self._unlabelled().inc(amount)
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def set(self, value):
+        self._unlabelled().set(value)
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    def render(self, name, labels):
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self._buckets + (float('inf'),), counts):
+            cumulative += count
+            le = "+Inf" if math.isinf(bound) else repr(bound)
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+class _Timer:
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._started)
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._unlabelled().observe(value)
+
+    def time(self):
+        return self._unlabelled().time()
+
+def render():
+    """Every registered metric, in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# Watcher / Live Client API
+POLL_REQUEST_SECONDS = Histogram("nexus_poll_request_seconds", "Live Client API request latency.", ["endpoint"])
+POLL_PAYLOAD_BYTES = Histogram("nexus_poll_payload_bytes", "Live Client API response size.", ["endpoint"], BYTES_BUCKETS)
+POLL_ROUND_SECONDS = Histogram("nexus_poll_round_seconds", "Duration of a watcher polling round.")
+POLL_ERRORS = Counter("nexus_poll_errors_total", "Failed polling rounds by kind.", ["kind"])
+
+# Data preparation
+PRUNE_SECONDS = Histogram("nexus_prune_seconds", "Time to project the game data onto the prompt schema.")
+FILTER_EVENTS_SECONDS = Histogram("nexus_filter_events_seconds", "Time to select the recent events sent to the AI (EventLog.window).")
+
+# AI
+PROMPT_CHARS = Histogram("nexus_prompt_chars", "Prompt size in characters.", ["kind"], SIZE_BUCKETS)
+PROMPT_TOKENS = Histogram("nexus_prompt_tokens", "Estimated prompt size in tokens.", ["kind"], SIZE_BUCKETS)
+LLM_FIRST_CHUNK_SECONDS = Histogram("nexus_llm_first_chunk_seconds", "Time to the first chunk of an answer.", ["kind"], LLM_BUCKETS)
+LLM_SECONDS = Histogram("nexus_llm_seconds", "Time to the complete answer.", ["kind"], LLM_BUCKETS)
+LLM_REQUESTS = Counter("nexus_llm_requests_total", "AI calls by kind and outcome.", ["kind", "outcome"])
+LLM_HEDGES = Counter("nexus_llm_hedges_total", "Prompts also sent to the hedge model.")
+LLM_RETRIES = Counter("nexus_llm_retries_total", "AI attempts retried after a failure.")
+ADVICE_CACHE = Counter("nexus_advice_cache_total", "Early-game plan cache lookups.", ["result"])
+ADVICE_AGE_SECONDS = Gauge("nexus_advice_age_seconds", "Time since the displayed advice was requested.", ["session"])
@@ -0,0 +1,59 @@
+import time
+
+# Game phases (seconds of game time): one rolling summary each
+PHASES = (
+    ("Early game", 0, 14 * 60),
+    ("Mid game", 14 * 60, 25 * 60),
+    ("Late game", 25 * 60, float('inf')),
+)
+
+def phase_of(game_time):
+    return next(name for name, start, end in PHASES if start <= game_time < end)
+
+class PhaseSummarizer:
+    """
+    Keeps a short summary per game phase, built in the background during the game.
+
+    Every `interval` seconds of game time (or when a phase boundary is crossed),
+    the window not yet covered is summarized together with the current summary
+    of its phase, which it replaces. The post-game report then only has to
+    reduce at most one summary per phase plus the uncovered tail, so its prompt
+    does not grow with the length of the game.
+    """
+
+    def __init__(self, interval, retry_delay=30):
+        self.interval = interval
+        self.retry_delay = retry_delay
+        self.summaries = {}
+        self.covered_until = 0
+        self.in_flight = False
+        self.retry_at = 0
+
+    def due(self, game_time, now=None):
+        now = now or time.time()
+        if self.in_flight or now < self.retry_at:
+            return False
+        return (game_time - self.covered_until >= self.interval
+                or phase_of(game_time) != phase_of(self.covered_until))
+
+    def pieces(self, end_time):
+        """Uncovered window up to `end_time`, split at phase boundaries: [(phase, start, end)]."""
+        return [
+            (name, max(start, self.covered_until), min(end, end_time))
+            for name, start, end in PHASES
+            if start < end_time and end > self.covered_until
+        ]
+
+    def covered(self, phase, summary, end_time):
+        self.summaries[phase] = summary
+        self.covered_until = end_time
+
+    def completed(self):
+        self.in_flight = False
+
+    def failed(self):
+        self.in_flight = False
+        self.retry_at = time.time() + self.retry_delay
+
+    def ordered_summaries(self):
+        return [(name, self.summaries[name]) for name, _, _ in PHASES if name in self.summaries]
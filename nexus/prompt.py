@@ -0,0 +1,155 @@
+import re
+from .features import format_features
+from .utils import format_event, format_gametime
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), enough to enforce a budget."""
+    return (len(text) + 3) // 4
+
+def summarize_advice(html, max_chars=200):
+    """Short plain-text summary of an HTML advice: its first bullet points."""
+    items = re.findall(r'<li[^>]*>(.*?)</li>', html, re.S) or [html]
+    text = " ; ".join(re.sub(r'<[^>]+>', '', item).strip() for item in items[:3])
+    text = re.sub(r'\s+', ' ', text)
+    return text if len(text) <= max_chars else text[:max_chars - 1] + "…"
+
+def format_end_state(game_data):
+    """Final stats of every player, one line each (constant size whatever the game length)."""
+    lines = [f"Mon or: {int(game_data.get('activePlayer', {}).get('currentGold', 0))}"]
+    for p in game_data.get('allPlayers', []):
+        scores = p.get('scores', {})
+        kda = "/".join(str(scores.get(k, 0)) for k in ('kills', 'deaths', 'assists'))
+        items = ", ".join(item.get('name', '?') for item in p.get('items', []))
+        lines.append(
+            f"{p.get('championName')} ({p.get('team', '')} {p.get('position') or '?'}) | niv {p.get('level', 0)}"
+            f" | cs {scores.get('creepScore', 0)} | {kda} | items: {items or 'aucun'}"
+        )
+    return "\n".join(lines)
+
+class TacticalPromptBuilder:
+    """
+    Builds the data part of the tactical prompt as a delta since the last advice.
+
+    Team compositions are turned into a compact table once per game; each prompt
+    then only carries the current numbers with their change since the last
+    delivered advice (gold, level, CS, KDA), new items, new events, and short
+    summaries of the previous advice instead of their raw HTML. Team and lane
+    aggregates (nexus.features) come as a small table of differences.
+    Optional sections are dropped, oldest lines first, to fit the token budget.
+    """
+
+    def __init__(self, history_size=3):
+        self.history_size = history_size
+        self.reset()
+
+    def reset(self):
+        self.teams_table = None
+        self.baseline = None
+        self._pending = None
+        self.summaries = []
+
+    def build(self, game_data, game_time, my_champion, budget, features=None):
+        players = game_data.get('allPlayers', [])
+        if self.teams_table is None and players:
+            self.teams_table = self._teams_table(players, my_champion)
+
+        current = self._snapshot(game_data, game_time)
+        self._pending = current
+        base = self.baseline
+
+        since = f", depuis {format_gametime(base['time'])}" if base else ""
+        parts = [
+            f"ÉQUIPES:\n{self.teams_table or 'Inconnues'}",
+            f"ÉTAT ({format_gametime(game_time)}{since}):\n" + "\n".join(self._status_lines(current, base)),
+        ]
+        if features:
+            parts.insert(1, f"RAPPORT DE FORCE (Alliés vs Ennemis):\n{format_features(features)}")
+        used = estimate_tokens("\n\n".join(parts))
+
+        last_time = base['time'] if base else -1
+        events = [format_event(e) for e in game_data.get('events', {}).get('Events', [])
+                  if e.get('EventTime', 0) > last_time]
+        optional = (
+            ("NOUVEAUX ÉVÉNEMENTS", events),
+            ("TES CONSEILS PRÉCÉDENTS (résumés)", self.summaries),
+        )
+        for title, lines in optional:
+            kept = []
+            used += estimate_tokens(title) + 1
+            # Most recent lines are the most useful: fill from the end
+            for line in reversed(lines):
+                cost = estimate_tokens(line) + 1
+                if used + cost > budget:
+                    break
+                kept.append(line)
+                used += cost
+            if kept:
+                parts.append(f"{title}:\n" + "\n".join(reversed(kept)))
+
+        context = "\n\n".join(parts)
+        if estimate_tokens(context) > budget:
+            context = context[:budget * 4]
+        return context
+
+    def commit(self, advice_html):
+        """Called once an advice is delivered: it becomes the reference for the next delta."""
+        if self._pending is not None:
+            self.baseline = self._pending
+            self._pending = None
+        self.summaries.append(summarize_advice(advice_html))
+        del self.summaries[:-self.history_size]
+
+    def _teams_table(self, players, my_champion):
+        my_team = next((p.get('team') for p in players if p.get('championName') == my_champion), None)
+        rows = []
+        for team in sorted({p.get('team', '') for p in players}, key=lambda t: t != my_team):
+            label = "Alliés" if team == my_team else "Ennemis"
+            champions = ", ".join(
+                f"{p.get('championName')}{' (Moi)' if p.get('championName') == my_champion else ''}"
+                f"/{p.get('position') or '?'}"
+                for p in players if p.get('team', '') == team
+            )
+            rows.append(f"{label} ({team}): {champions}")
+        return "\n".join(rows)
+
+    def _snapshot(self, game_data, game_time):
+        return {
+            'time': game_time,
+            'gold': int(game_data.get('activePlayer', {}).get('currentGold', 0)),
+            'players': {
+                p.get('championName'): {
+                    'level': p.get('level', 0),
+                    'cs': p.get('scores', {}).get('creepScore', 0),
+                    'kda': tuple(p.get('scores', {}).get(k, 0) for k in ('kills', 'deaths', 'assists')),
+                    'items': [item.get('name') for item in p.get('items', [])],
+                    'dead': p.get('isDead', False),
+                }
+                for p in game_data.get('allPlayers', [])
+            },
+        }
+
+    def _status_lines(self, current, base):
+        def delta(now, before):
+            return f"({now - before:+d})" if before is not None and now != before else ""
+
+        gold_before = base['gold'] if base else None
+        lines = [f"Mon or: {current['gold']}{delta(current['gold'], gold_before)}"]
+
+        for champion, p in current['players'].items():
+            old = base['players'].get(champion) if base else None
+            kda = "/".join(map(str, p['kda']))
+            kda_delta = ""
+            if old and p['kda'] != old['kda']:
+                kda_delta = "(" + "/".join(f"{n - o:+d}" for n, o in zip(p['kda'], old['kda'])) + ")"
+
+            if old:
+                new_items = [i for i in p['items'] if i not in old['items']]
+                items = f" +items: {', '.join(new_items)}" if new_items else ""
+            else:
+                items = f" items: {', '.join(p['items'])}" if p['items'] else ""
+
+            lines.append(
+                f"{champion}{' [mort]' if p['dead'] else ''} | niv {p['level']}{delta(p['level'], old and old['level'])}"
+                f" | cs {p['cs']}{delta(p['cs'], old and old['cs'])} | {kda}{kda_delta}{items}"
+            )
+        return lines
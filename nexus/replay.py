@@ -0,0 +1,231 @@
+"""
+Record and replay Live Client games, to run the watcher and the AI path offline.
+
+    python -m nexus.replay record game.jsonl.gz
+    python -m nexus.replay serve game.jsonl.gz [--speed 4]
+    python -m nexus.replay bench game.jsonl.gz [--speed 10]
+
+A recording is a gzip JSONL file: one `allgamedata` snapshot per line with its
+offset in seconds since the first snapshot. The stand-in server derives every
+sub-endpoint (gamestats, activeplayer, playerlist, eventdata?eventID=N) from it.
+"""
+import argparse
+import bisect
+import gzip
+import json
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import requests
+from .config import Config
+from .client import ApiNotReady, LiveClient, resolve_target_ip
+
+def record(path, interval=2.0):
+    """Captures allgamedata snapshots until the game ends (or Ctrl+C)."""
+    client = LiveClient(resolve_target_ip())
+    started = None
+    count = 0
+
+    print(f"Recording to {path} (waiting for a game)...", flush=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        try:
+            while True:
+                try:
+                    snapshot = client.get_json("allgamedata")
+                except (ApiNotReady, requests.exceptions.ConnectionError):
+                    if started is not None:
+                        break # Game over
+                    time.sleep(interval)
+                    continue
+
+                now = time.monotonic()
+                started = started if started is not None else now
+                f.write(json.dumps({'t': round(now - started, 3), 'data': snapshot}) + "\n")
+                count += 1
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+    print(f"Recorded {count} snapshots.", flush=True)
+
+def load_recording(path):
+    """Returns the list of (offset, snapshot) of a recording."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [(line['t'], line['data']) for line in map(json.loads, f) if line]
+
+def _self_signed_cert(directory):
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-keyout", keyfile, "-out", certfile],
+        check=True, capture_output=True,
+    )
+    return certfile, keyfile
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.server.replay.done.is_set():
+            # Game over: drop kept-alive connections too
+            self.close_connection = True
+            return
+
+        url = urlsplit(self.path)
+        endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+        snapshot = self.server.replay.current()
+
+        if endpoint == 'allgamedata':
+            body = snapshot
+        elif endpoint == 'gamestats':
+            body = snapshot.get('gameData', {})
+        elif endpoint == 'activeplayer':
+            body = snapshot.get('activePlayer', {})
+        elif endpoint == 'activeplayername':
+            body = snapshot.get('activePlayer', {}).get('summonerName', '')
+        elif endpoint == 'playerlist':
+            body = snapshot.get('allPlayers', [])
+        elif endpoint == 'eventdata':
+            first_id = int(parse_qs(url.query).get('eventID', ['0'])[0])
+            events = snapshot.get('events', {}).get('Events', [])
+            body = {'Events': [e for e in events if e.get('EventID', 0) >= first_id]}
+        else:
+            return self._send(404, {'errorCode': 'RESOURCE_NOT_FOUND', 'httpStatus': 404})
+        self._send(200, body)
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+class ReplayServer:
+    """
+    HTTPS stand-in for the Live Client API on port 2999, replaying a recording
+    at `speed` x real time. Once the recording is over the server closes, which
+    the watcher sees as the end of the game.
+    """
+
+    def __init__(self, snapshots, speed=1.0, port=Config.LOL_API_PORT, certfile=None, keyfile=None):
+        self.times = [t for t, _ in snapshots]
+        self.snapshots = [s for _, s in snapshots]
+        self.speed = speed
+        self.port = port
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.started = None
+        self.done = threading.Event()
+        self._server = None
+
+    def elapsed(self):
+        return (time.monotonic() - self.started) * self.speed
+
+    def current(self):
+        index = bisect.bisect_right(self.times, self.elapsed()) - 1
+        return self.snapshots[max(index, 0)]
+
+    def start(self):
+        if not self.certfile:
+            self.certfile, self.keyfile = _self_signed_cert(tempfile.mkdtemp(prefix="nexus-replay-"))
+
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.certfile, self.keyfile)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), _ReplayHandler)
+        self._server.daemon_threads = True
+        self._server.socket = context.wrap_socket(self._server.socket, server_side=True)
+        self._server.replay = self
+
+        self.started = time.monotonic()
+        threading.Thread(target=self._server.serve_forever, name="replay-server", daemon=True).start()
+        threading.Thread(target=self._stop_at_end, name="replay-clock", daemon=True).start()
+        print(f"Replaying {len(self.snapshots)} snapshots at x{self.speed} on port {self.port}", flush=True)
+
+    def _stop_at_end(self):
+        while self.elapsed() <= self.times[-1]:
+            time.sleep(0.1)
+        self.done.set()
+        self._server.shutdown()
+        self._server.server_close()
+        print("Replay finished: Live Client API closed.", flush=True)
+
+def _describe(values, unit, scale=1.0):
+    if not values:
+        return "n/a"
+    values = sorted(v * scale for v in values)
+    return (f"n={len(values)} avg={sum(values) / len(values):.1f}{unit} "
+            f"p50={values[len(values) // 2]:.1f}{unit} max={values[-1]:.1f}{unit}")
+
+def bench(path, speed=10.0):
+    """Runs the watcher and the AI path end to end against a replay, then prints measurements."""
+    from .ai import ai
+    from .llm import FakeBackend
+    from .session import Session
+    from .utils import project_game_data
+    from .watcher import poller
+
+    snapshots = load_recording(path)
+
+    prune_times = []
+    for _, snapshot in snapshots:
+        started = time.perf_counter()
+        project_game_data(snapshot)
+        prune_times.append(time.perf_counter() - started)
+
+    # Same number of AI calls per game minute as in real time
+    for setting in ('AI_UPDATE_INTERVAL', 'ADVICE_DEBOUNCE', 'ADVICE_MIN_SPACING', 'ADVICE_RATE_WINDOW'):
+        setattr(Config, setting, getattr(Config, setting) / speed)
+    fake_backend = FakeBackend()
+    ai.backend = fake_backend
+
+    server = ReplayServer(snapshots, speed=speed)
+    server.start()
+    session = Session("replay", "127.0.0.1", server.port)
+    poller.start([session])
+    server.done.wait()
+
+    # Leave time for the post-game report
+    ended = time.perf_counter()
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline and not any(
+        c['started'] >= ended and c['finished'] for c in fake_backend.calls
+    ):
+        time.sleep(0.2)
+
+    calls = [c for c in fake_backend.calls if c['finished']]
+    print("\n=== Replay benchmark ===")
+    for endpoint, stats in session.client.latency_report().items():
+        print(f"poll {endpoint:<14} n={stats['count']} avg={stats['avg_ms']}ms max={stats['max_ms']}ms")
+    print(f"prune (projection)  {_describe(prune_times, 'µs', 1e6)}")
+    print(f"prompt size         {_describe([c['prompt_chars'] for c in fake_backend.calls], ' chars')}")
+    print(f"first chunk         {_describe([c['first_chunk'] - c['started'] for c in calls], 's')}")
+    print(f"advice turnaround   {_describe([c['finished'] - c['started'] for c in calls], 's')}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["record", "serve", "bench"])
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=None, help="Replay speed (serve: 1, bench: 10)")
+    parser.add_argument("--interval", type=float, default=2.0, help="Recording interval in seconds")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.recording, args.interval)
+    elif args.command == "serve":
+        server = ReplayServer(load_recording(args.recording), speed=args.speed or 1.0)
+        server.start()
+        server.done.wait()
+    else:
+        bench(args.recording, speed=args.speed or 10.0)
@@ -0,0 +1,134 @@
+import time
+from collections import deque
+from .config import Config
+from .features import item_value
+
+# How much each event weighs towards an early advice, and its label on the dashboard
+EVENT_SCORES = {
+    'BaronKill': (5, "Baron"),
+    'InhibKilled': (4, "Inhibiteur"),
+    'Ace': (4, "Ace"),
+    'DragonKill': (3, "Dragon"),
+    'HeraldKill': (2, "Héraut"),
+    'TurretKilled': (2, "Tour"),
+    'Multikill': (2, "Multikill"),
+    'HordeKill': (1, "Larves"),
+    'FirstBlood': (1, "First Blood"),
+}
+MY_DEATH_SCORE = 3
+
+class AdviceScheduler:
+    """
+    Decides when the AI should be asked for advice, instead of a fixed timer.
+
+    Significant moments (objectives, aces, death of the active player, gold swings)
+    add up to a score. Once it reaches Config.ADVICE_TRIGGER_SCORE, advice is
+    requested as soon as the burst settles (debounce), never closer than
+    ADVICE_MIN_SPACING to the previous call and within a rolling rate budget.
+    Otherwise advice is refreshed every AI_UPDATE_INTERVAL, and only if the game
+    changed meanwhile.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.score = 0
+        self.reasons = []
+        self.last_significant = 0
+        self.last_call = 0
+        self.call_times = deque()
+        self.changed = False
+        self.in_flight = False
+        self.retry = False
+        self._fingerprint = None
+        self._gold_diff_at_call = None
+        self._gold_diff = 0
+
+    def observe(self, new_events, my_names, all_players, my_team, now=None):
+        """Scores what happened since the previous poll."""
+        now = now or time.time()
+
+        for event in new_events:
+            name = event.get('EventName')
+            score, label = EVENT_SCORES.get(name, (0, name))
+            if name == 'ChampionKill' and event.get('VictimName') in my_names:
+                score, label = MY_DEATH_SCORE, "Ma mort"
+            self.changed = True
+            if score:
+                self._add(score, label, now)
+
+        # Gold swing, estimated from the value of each team's items
+        self._gold_diff = sum(
+            item_value(p.get('items', [])) * (1 if p.get('team') == my_team else -1)
+            for p in all_players
+        )
+        if self._gold_diff_at_call is None:
+            self._gold_diff_at_call = self._gold_diff
+        elif abs(self._gold_diff - self._gold_diff_at_call) >= Config.ADVICE_GOLD_SWING and "Écart d'or" not in self.reasons:
+            self._add(Config.ADVICE_TRIGGER_SCORE, "Écart d'or", now)
+
+        fingerprint = tuple((p.get('level'), len(p.get('items', []))) for p in all_players)
+        if fingerprint != self._fingerprint:
+            self.changed = self.changed or self._fingerprint is not None
+            self._fingerprint = fingerprint
+
+    def _add(self, score, reason, now):
+        self.score += score
+        self.reasons.append(reason)
+        self.last_significant = now
+
+    def next_call_at(self, now=None):
+        """Wall time of the next planned call, or None if nothing justifies one."""
+        now = now or time.time()
+        if self.in_flight:
+            return None
+        if not self.last_call:
+            return now
+
+        earliest = self.last_call + Config.ADVICE_MIN_SPACING
+        while self.call_times and self.call_times[0] < now - Config.ADVICE_RATE_WINDOW:
+            self.call_times.popleft()
+        if len(self.call_times) >= Config.ADVICE_RATE_LIMIT:
+            earliest = max(earliest, self.call_times[0] + Config.ADVICE_RATE_WINDOW)
+
+        if self.retry:
+            return earliest
+        if self.score >= Config.ADVICE_TRIGGER_SCORE:
+            return max(earliest, self.last_significant + Config.ADVICE_DEBOUNCE)
+        if self.changed:
+            return max(earliest, self.last_call + Config.AI_UPDATE_INTERVAL)
+        return None
+
+    def due(self, now=None):
+        now = now or time.time()
+        call_at = self.next_call_at(now)
+        return call_at is not None and call_at <= now
+
+    def plan(self, now=None):
+        """What the scheduler intends to do, for the dashboard."""
+        if self.in_flight:
+            return {'deadline': None, 'text': "En cours...", 'reason': ""}
+        call_at = self.next_call_at(now)
+        if call_at is None:
+            return {'deadline': None, 'text': "En veille", 'reason': "rien de nouveau"}
+        reason = ", ".join(dict.fromkeys(self.reasons)) if self.score >= Config.ADVICE_TRIGGER_SCORE else ""
+        return {'deadline': round(call_at), 'text': "", 'reason': reason}
+
+    def mark_called(self, now=None):
+        now = now or time.time()
+        self.last_call = now
+        self.call_times.append(now)
+        self.in_flight = True
+        self.retry = False
+        self.score = 0
+        self.reasons = []
+        self.changed = False
+        self._gold_diff_at_call = self._gold_diff
+
+    def completed(self):
+        self.in_flight = False
+
+    def failed(self):
+        self.in_flight = False
+        self.retry = True
@@ -0,0 +1,32 @@
+from .config import Config
+from .client import LiveClient, resolve_target_ip
+from .state import GameState
+from .worker import AdviceWorker, ai_pool
+
+class Session:
+    """One coached player: its game state, its Live Client API and its AI jobs."""
+
+    def __init__(self, name, host, port=None):
+        self.name = name
+        self.state = GameState()
+        self.client = LiveClient(host, port)
+        self.worker = AdviceWorker(ai_pool, Config.SESSION_AI_CONCURRENCY)
+
+def parse_sessions(spec):
+    """"alice=192.168.1.10,bob=192.168.1.11:2999" -> [(name, host, port)]"""
+    entries = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, address = item.partition("=")
+        host, _, port = address.partition(":")
+        name, host, port = name.strip(), host.strip(), port.strip()
+        if not name or not host or (port and not port.isdigit()):
+            raise ValueError(f"NEXUS_SESSIONS: invalid entry '{item}', expected name=host[:port]")
+        entries.append((name, host, int(port) if port else None))
+    return entries
+
+def load_sessions(spec):
+    entries = parse_sessions(spec) or [("default", resolve_target_ip(), None)]
+    return {name: Session(name, host, port) for name, host, port in entries}
+
+# Singleton: sessions by name, in configuration order
+sessions = load_sessions(Config.SESSIONS)
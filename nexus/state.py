@@ -1,27 +1,101 @@
+import threading
+from types import MappingProxyType
+from .config import Config
+from .events import EventLog
+from .phases import PhaseSummarizer
+from .prompt import TacticalPromptBuilder
+from .scheduler import AdviceScheduler
+from .timeline import GameTimeline
 from .utils import get_loader_html
 
+class Settings:
+    """Mutable settings shared by every session (changed from /settings)."""
+
+    def __init__(self):
+        self.gemini_model = Config.GEMINI_MODEL
+        self.gemini_api_key = Config.GEMINI_API_KEY
+        self.debug_mode = False
+
 class GameState:
-    _instance = None
+    """
+    State of one session, shared by its watcher, its AI jobs and the Flask request threads.
+
+    Streamed fields are only written through `publish()`, which sets them
+    together under the lock and publishes a new immutable snapshot with a new
+    version. Readers take `snapshot()` and never see half an update (e.g. new
+    advice with the previous game time).
+    """
+    # Fields pushed to the dashboard through /api/stream
+    STREAM_FIELDS = {'latest_advice', 'current_game_mode', 'last_advice_gametime', 'last_gemini_call', 'advice_plan'}
+
+    def __init__(self):
+        object.__setattr__(self, '_changed', threading.Condition())
+        object.__setattr__(self, 'version', 0)
+        object.__setattr__(self, '_snapshot', MappingProxyType({'version': 0}))
+        self.reset()
+
+    def __setattr__(self, name, value):
+        if name in self.STREAM_FIELDS:
+            self.publish(**{name: value})
+        else:
+            object.__setattr__(self, name, value)
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(GameState, cls).__new__(cls)
-            cls._instance.reset()
-        return cls._instance
+    def publish(self, **fields):
+        """Sets several streamed fields at once: one new version, one snapshot. Returns the version."""
+        unknown = fields.keys() - self.STREAM_FIELDS
+        if unknown:
+            raise AttributeError(f"Not a streamed field: {', '.join(sorted(unknown))}")
+
+        with self._changed:
+            changed = {name: value for name, value in fields.items() if getattr(self, name, None) != value}
+            if not changed:
+                return self.version
+            for name, value in changed.items():
+                object.__setattr__(self, name, value)
+
+            version = self.version + 1
+            snapshot = {name: getattr(self, name, None) for name in self.STREAM_FIELDS}
+            snapshot['version'] = version
+            object.__setattr__(self, 'version', version)
+            object.__setattr__(self, '_snapshot', MappingProxyType(snapshot))
+            self._changed.notify_all()
+            return version
+
+    def snapshot(self):
+        """Latest published streamed fields (read-only, consistent, with their `version`)."""
+        return self._snapshot
+
+    def wait_for_change(self, since, timeout=None):
+        """Blocks until a version newer than `since` is published, returns the current snapshot."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != since, timeout)
+            return self._snapshot
 
     def reset(self):
-        self.latest_advice = get_loader_html("En attente du lien neural avec la Faille de l'invocateur...")
-        self.last_gemini_call = 0
-        self.advice_history = []
-        self.current_game_mode = "Unknown"
-        self.last_advice_gametime = "00:00"
-        self.debug_mode = False
-        self.last_valid_game_data = None
-        
-        # Mutable Settings
-        from .config import Config
-        self.gemini_model = Config.GEMINI_MODEL
-        self.gemini_api_key = Config.GEMINI_API_KEY
+        with self._changed:
+            self.publish(
+                latest_advice=get_loader_html("En attente du lien neural avec la Faille de l'invocateur..."),
+                last_gemini_call=0,
+                current_game_mode="Unknown",
+                last_advice_gametime="00:00",
+            )
+            self.last_valid_game_data = None
+            self.last_prompt_tokens = 0
+            self.new_game()
+
+    def new_game(self, **fields):
+        """
+        Fresh per-game components (a worker still holding the old ones is not affected).
+        `fields` are published in the same version as the reset advice plan.
+        """
+        with self._changed:
+            self.advice_history = []
+            self.event_log = EventLog(Config.EVENT_LOG_RETENTION)
+            self.timeline = GameTimeline(Config.TIMELINE_INTERVAL, Config.TIMELINE_CAPACITY)
+            self.prompt_builder = TacticalPromptBuilder()
+            self.advice_scheduler = AdviceScheduler()
+            self.phase_summarizer = PhaseSummarizer(Config.PHASE_SUMMARY_INTERVAL)
+            self.publish(advice_plan=self.advice_scheduler.plan(), **fields)
 
-# Singleton instance
-state = GameState()
+# Singleton
+settings = Settings()
@@ -0,0 +1,151 @@
+from array import array
+from .features import item_value
+from .utils import format_event, format_gametime
+
+# Events worth keeping in the match timeline
+KEY_EVENTS = {
+    'FirstBlood', 'ChampionKill', 'Multikill', 'Ace',
+    'DragonKill', 'HeraldKill', 'BaronKill', 'HordeKill',
+    'TurretKilled', 'InhibKilled', 'GameEnd',
+}
+
+class GameTimeline:
+    """
+    Compact record of the match for the post-game analysis.
+
+    Per-player numeric series are sampled every `interval` seconds of game time
+    into fixed-size arrays used as ring buffers (one column per player and metric),
+    so memory is bounded by `capacity` samples whatever the game length.
+    The Live Client API only exposes the gold of the active player: other players
+    are compared on the value of their items.
+    Events are kept once each, deduplicated by EventID.
+    """
+
+    METRICS = ('level', 'cs', 'kills', 'deaths', 'assists', 'item_value')
+
+    def __init__(self, interval, capacity):
+        self.interval = interval
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        self.players = []
+        self._player_index = {}
+        self.times = array('f', bytes(4 * self.capacity))
+        self.active_gold = array('I', bytes(4 * self.capacity))
+        self.columns = {}
+        self.head = 0
+        self.size = 0
+        self.last_sample_time = None
+        self.events = []
+        self._event_ids = set()
+
+    def add_events(self, events):
+        for event in events:
+            event_id = event.get('EventID')
+            if event_id in self._event_ids or event.get('EventName') not in KEY_EVENTS:
+                continue
+            self._event_ids.add(event_id)
+            self.events.append(event)
+
+    def record(self, game_time, active_player, all_players):
+        """Samples the players' stats if `interval` seconds passed since the last sample."""
+        if self.last_sample_time is not None and game_time - self.last_sample_time < self.interval:
+            return
+        self.last_sample_time = game_time
+
+        slot = self.head
+        self.times[slot] = game_time
+        self.active_gold[slot] = int(active_player.get('currentGold', 0))
+
+        for p in all_players:
+            index = self._register(p)
+            scores = p.get('scores', {})
+            values = (
+                p.get('level', 0),
+                scores.get('creepScore', 0),
+                scores.get('kills', 0),
+                scores.get('deaths', 0),
+                scores.get('assists', 0),
+                item_value(p.get('items', [])),
+            )
+            for metric, value in zip(self.METRICS, values):
+                self.columns[(index, metric)][slot] = int(value)
+
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _register(self, player):
+        key = player.get('summonerName') or player.get('championName')
+        if key not in self._player_index:
+            self._player_index[key] = len(self.players)
+            self.players.append({
+                'champion': player.get('championName', 'Unknown'),
+                'team': player.get('team', ''),
+                'position': player.get('position', ''),
+            })
+            for metric in self.METRICS:
+                self.columns[(self._player_index[key], metric)] = array('I', bytes(4 * self.capacity))
+        return self._player_index[key]
+
+    def _ordered_slots(self):
+        start = (self.head - self.size) % self.capacity
+        return [(start + step) % self.capacity for step in range(self.size)]
+
+    def gold_lead(self, my_team, points=5):
+        """Item value lead of `my_team` over the latest `points` samples: [(game_time, lead)]."""
+        signs = [1 if player['team'] == my_team else -1 for player in self.players]
+        values = [self.columns[(index, 'item_value')] for index in range(len(self.players))]
+        return [
+            (self.times[slot], sum(sign * column[slot] for sign, column in zip(signs, values)))
+            for slot in self._ordered_slots()[-points:]
+        ]
+
+    def value_at(self, champion, metric, game_time):
+        """Value of a champion's metric at the last sample before `game_time`, or None."""
+        index = next((i for i, player in enumerate(self.players) if player['champion'] == champion), None)
+        slots = [s for s in self._ordered_slots() if self.times[s] <= game_time]
+        if index is None or not slots:
+            return None
+        return self.columns[(index, metric)][slots[-1]]
+
+    def export(self):
+        """Samples in time order and events, as JSON-serializable data (match history)."""
+        slots = self._ordered_slots()
+        return {
+            'times': [round(self.times[s], 1) for s in slots],
+            'active_gold': [self.active_gold[s] for s in slots],
+            'players': [
+                {**player, **{metric: [self.columns[(index, metric)][s] for s in slots] for metric in self.METRICS}}
+                for index, player in enumerate(self.players)
+            ],
+            'events': self.events,
+        }
+
+    def window_summary(self, start, end, max_events=30):
+        """What changed between two game times: first and last sample of the window, and its events."""
+        slots = [s for s in self._ordered_slots() if start <= self.times[s] <= end]
+        if not slots:
+            return "Aucune donnée de timeline."
+        first, last = slots[0], slots[-1]
+
+        def change(values):
+            return f"{values[0]}→{values[1]}" if values[0] != values[1] else str(values[0])
+
+        lines = [f"De {format_gametime(self.times[first])} à {format_gametime(self.times[last])}"]
+        lines.append(f"Gold (moi): {change((self.active_gold[first], self.active_gold[last]))}")
+        for index, player in enumerate(self.players):
+            col = lambda metric: (self.columns[(index, metric)][first], self.columns[(index, metric)][last])
+            kda = ["/".join(str(self.columns[(index, m)][s]) for m in ('kills', 'deaths', 'assists')) for s in (first, last)]
+            lines.append(
+                f"{player['champion']} ({player['team']}) | niv {change(col('level'))} | cs {change(col('cs'))} | "
+                f"kda {change(kda)} | items {change(col('item_value'))}"
+            )
+
+        events = [e for e in self.events if start <= e.get('EventTime', 0) <= end]
+        if len(events) > max_events:
+            objectives = [e for e in events if e.get('EventName') not in ('ChampionKill', 'Multikill')]
+            events = objectives[-max_events:]
+        lines.append("Événements clés:")
+        lines.extend(f"- {format_event(e)}" for e in events)
+        return "\n".join(lines)
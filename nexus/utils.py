@@ -1,4 +1,7 @@
 import os
+import re
+from html.parser import HTMLParser
+from . import metrics
 
 def get_loader_html(message="Analyse en cours..."):
     return f"""
@@ -11,43 +14,68 @@ def get_loader_html(message="Analyse en cours..."):
     </div>
     """
 
+# Balises sans fermeture en HTML
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+class _OpenTagTracker(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.open_tags = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_endtag(self, tag):
+        # On dépile jusqu'à la balise correspondante (tolère le HTML mal imbriqué)
+        if tag in self.open_tags:
+            while self.open_tags.pop() != tag:
+                pass
+
+def render_partial_html(fragment, streaming=False):
+    """
+    Rend affichable une réponse HTML de l'IA, même incomplète (streaming).
+    - Retire les blocs ```html que le modèle ajoute parfois.
+    - Coupe une balise ou une entité tronquée en fin de texte.
+    - Referme les balises restées ouvertes pour ne pas casser la page.
+    """
+    html = re.sub(r'^\s*```(?:html)?\s*', '', fragment)
+    html = re.sub(r'\s*```\s*$', '', html)
+
+    # Balise tronquée : un '<' après le dernier '>'
+    if html.rfind('<') > html.rfind('>'):
+        html = html[:html.rfind('<')]
+    # Entité tronquée : '&' sans ';' en fin de texte
+    html = re.sub(r'&[#\w]*$', '', html)
+
+    tracker = _OpenTagTracker()
+    tracker.feed(html)
+    tracker.close()
+
+    if streaming:
+        html += '<span class="animate-pulse text-hextech-blue">▍</span>'
+    return html + ''.join(f'</{tag}>' for tag in reversed(tracker.open_tags))
+
 def format_gametime(seconds):
     minutes = int(seconds // 60)
     secs = int(seconds % 60)
     return f"{minutes:02}:{secs:02}"
 
-def filter_events(game_data, seconds=120):
-    """
-    Ne conserve que les événements survenus dans les 'seconds' dernières secondes.
-    Si le JSON est incomplet (début de chargement), on le retourne tel quel.
-    """
-    try:
-        # On vérifie que les données nécessaires existent
-        if 'gameData' not in game_data or 'events' not in game_data:
-            return game_data
-            
-        current_time = game_data['gameData']['gameTime']
-        events_list = game_data['events'].get('Events', [])
-        
-        # Filtrage : On garde l'event si (TempsEvent > TempsActuel - 120s)
-        recent_events = [
-            event for event in events_list 
-            if event['EventTime'] > (current_time - seconds)
-        ]
-        
-        # On remplace la liste originale par la version filtrée
-        game_data['events']['Events'] = recent_events
-        return game_data
-
-    except Exception as e:
-        # En cas de structure imprévue, on ne casse pas le programme, on renvoie la data
-        return game_data
+def format_event(event):
+    """Résumé d'un événement sur une ligne, ex: '12:30 DragonKill KillerName=Ahri DragonType=Fire'."""
+    details = " ".join(
+        f"{k}={event[k]}" for k in ('KillerName', 'VictimName', 'DragonType', 'TurretKilled', 'InhibKilled', 'Result')
+        if k in event
+    )
+    return f"{format_gametime(event.get('EventTime', 0))} {event.get('EventName')} {details}".rstrip()
 
 def prune_data(data):
     """
     Nettoie récursivement le JSON pour l'IA.
     - Supprime les descriptions, skins, IDs internes, et données statiques.
     - Simplifie drastiquement la liste des items.
+    Version d'origine, conservée comme référence pour bench_prune.py :
+    le polling utilise project_game_data.
     """
     
     # Liste noire : Clés à supprimer sans pitié
@@ -101,6 +129,71 @@ def prune_data(data):
     else:
         return data
 
+def compile_projection(spec):
+    """
+    Compile un schéma de projection en une fonction qui extrait, en une seule passe,
+    uniquement les champs déclarés. La source n'est jamais modifiée.
+    - True : valeur gardée telle quelle
+    - [sous_schema] : appliqué à chaque élément de la liste
+    - {cle: sous_schema} ou {cle_sortie: ('cle_source', sous_schema)} : champs retenus
+    """
+    if spec is True:
+        return lambda value: value
+
+    if isinstance(spec, list):
+        project_item = compile_projection(spec[0])
+        return lambda value: [project_item(v) for v in value] if isinstance(value, list) else value
+
+    fields = []
+    for out_key, sub_spec in spec.items():
+        src_key, sub_spec = sub_spec if isinstance(sub_spec, tuple) else (out_key, sub_spec)
+        fields.append((out_key, src_key, compile_projection(sub_spec)))
+
+    def project(value):
+        if not isinstance(value, dict):
+            return value
+        return {out_key: fn(value[src_key]) for out_key, src_key, fn in fields if src_key in value}
+
+    return project
+
+_RUNE = {'displayName': True, 'id': True}
+
+# Champs du Live Client API utiles aux prompts (mêmes données que prune_data)
+GAME_DATA_SCHEMA = {
+    'activePlayer': {
+        'championStats': True,
+        'currentGold': True,
+        'level': True,
+        'teamRelativeColors': True,
+    },
+    'allPlayers': [{
+        'championName': True,
+        'isBot': True,
+        'isDead': True,
+        'items': [{
+            'id': ('itemID', True),
+            'name': ('displayName', True),
+            'count': True,
+            'slot': True,
+        }],
+        'level': True,
+        'position': True,
+        'respawnTimer': True,
+        'runes': {'keystone': _RUNE, 'primaryRuneTree': _RUNE, 'secondaryRuneTree': _RUNE},
+        'scores': True,
+        'team': True,
+    }],
+    'events': {'Events': True},
+    'gameData': True,
+}
+
+_project_game_data = compile_projection(GAME_DATA_SCHEMA)
+
+def project_game_data(data):
+    """Projection de `data` sur GAME_DATA_SCHEMA, durée mesurée (nexus_prune_seconds)."""
+    with metrics.PRUNE_SECONDS.time():
+        return _project_game_data(data)
+
 def get_windows_host_ip():
     """
     Tries to detect the Windows host IP when running in WSL2.
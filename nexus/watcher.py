@@ -1,117 +1,299 @@
+import heapq
+import itertools
 import requests
+import threading
 import time
-import os
-import urllib3
+from concurrent.futures import ThreadPoolExecutor
+from . import metrics
 from .config import Config
-from .state import state
-from .utils import get_loader_html, filter_events, prune_data, get_windows_host_ip
+from .utils import get_loader_html, project_game_data
+from .client import ApiNotReady
 from .ai import ai
+from .prompt import format_end_state
+from .features import compute_features
+from .capture import debug_capture
+from .history import match_store
+from .state import settings
+
+class PollScheduler:
+    """
+    Decides which Live Client sub-endpoints to refresh and how long to sleep.
+
+    In game, each resource is refreshed on its own interval (Config.POLL_INTERVALS).
+    Out of game, only `gamestats` is probed: with exponential backoff while the API
+    is unreachable, at the fastest rate while it answers without game data
+    (loading screen), so game start is picked up as soon as possible.
+    """
+
+    def __init__(self, intervals, backoff_min, backoff_max):
+        self.intervals = intervals
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.in_game = False
+        self.next_due = {resource: 0 for resource in intervals}
+        self.backoff = backoff_min
+
+    def is_due(self, resource, now):
+        if not self.in_game:
+            return resource == 'gamestats'
+        return self.next_due[resource] <= now
+
+    def refreshed(self, resource, now):
+        if not self.in_game:
+            # gamestats answered: refresh everything right away
+            self.in_game = True
+            self.backoff = self.backoff_min
+            self.next_due = {r: 0 for r in self.intervals}
+        self.next_due[resource] = now + self.intervals[resource]
+
+    def offline(self, reachable=False):
+        self.in_game = False
+        if reachable:
+            self.backoff = self.backoff_min
+
+    def next_delay(self, now):
+        if self.in_game:
+            return max(0.0, min(self.next_due.values()) - now)
+
+        delay = self.backoff
+        self.backoff = min(self.backoff * 2, self.backoff_max)
+        return delay
+
+class Watcher:
+    """Follows the game of one session: polls its Live Client API and triggers its AI jobs."""
+
+    def __init__(self, session):
+        self.session = session
+        self.scheduler = PollScheduler(Config.POLL_INTERVALS, Config.OFFLINE_BACKOFF_MIN, Config.OFFLINE_BACKOFF_MAX)
+        self.resources = {}
+        self.last_game_time = 0
+
+    def poll_once(self):
+        """One polling round; returns the delay before the next one (seconds)."""
+        state = self.session.state
+        live_client = self.session.client
+        worker = self.session.worker
+        scheduler = self.scheduler
+        resources = self.resources
+        round_started = time.perf_counter()
 
-# Disable SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-def poll_lol_api():
-    # Determine target IP
-    target_ip = Config.WINDOWS_HOST
-    
-    if not target_ip and "microsoft" in os.uname().release.lower():
-        print("WSL2 detected. Attempting to find Windows host IP...", flush=True)
-        target_ip = get_windows_host_ip()
-        print(f"Targeting Windows Host at: {target_ip}", flush=True)
-    
-    if not target_ip:
-        target_ip = "127.0.0.1"
-    
-    print(f"Starting LoL API polling thread (Target: {target_ip})...", flush=True)
-    while True:
         try:
-            # Poll local LoL API
-            response = requests.get(
-                f"https://{target_ip}:{Config.LOL_API_PORT}/liveclientdata/allgamedata", 
-                verify=False, 
-                timeout=2.0
-            )
+            # Poll local LoL API, each sub-endpoint at its own rate
+            now = time.time()
+            event_log = state.event_log
+            timeline = state.timeline
+
+            if scheduler.is_due('gamestats', now):
+                # Out of game this is a cheap probe: fail fast if nothing listens
+                connect_timeout = None if scheduler.in_game else Config.PROBE_TIMEOUT
+                resources['gamestats'] = live_client.get_json("gamestats", connect_timeout=connect_timeout)
+                scheduler.refreshed('gamestats', now)
+
+            # Extract Game Mode & Time
+            game_data = resources['gamestats']
+            game_mode = game_data.get('gameMode', 'UNKNOWN')
+            game_time = game_data.get('gameTime', 0)
+            # A new game restarts the clock: drop the previous game history
+            if game_time < self.last_game_time:
+                state.new_game(current_game_mode=game_mode)
+                event_log = state.event_log
+                timeline = state.timeline
+            state.current_game_mode = game_mode
+            self.last_game_time = game_time
+
+            # Only fetch events we have not seen yet
+            new_events = []
+            if scheduler.is_due('eventdata', now):
+                response = live_client.get_json(f"eventdata?eventID={event_log.next_event_id}")
+                new_events = event_log.extend(response.get('Events', []))
+                timeline.add_events(new_events)
+                event_log.trim(game_time)
+                scheduler.refreshed('eventdata', now)
+
+            for resource in ('activeplayer', 'playerlist'):
+                if scheduler.is_due(resource, now):
+                    resources[resource] = live_client.get_json(resource)
+                    scheduler.refreshed(resource, now)
+
+            timeline.record(game_time, resources['activeplayer'], resources['playerlist'])
+
+            # Map step of the post-game report, in the background while the game goes on
+            phase_summarizer = state.phase_summarizer
+            if ai.backend and phase_summarizer.due(game_time, now):
+                phase_summarizer.in_flight = True
+                worker.submit('summary', ai.summarize_phases, phase_summarizer, timeline, game_time)
+
+            raw_data = {
+                'activePlayer': resources['activeplayer'],
+                'allPlayers': resources['playerlist'],
+                'events': {'Events': self._recent_events(event_log, game_time)},
+                'gameData': game_data,
+            }
+            clean_data = project_game_data(raw_data)
             
-            if response.status_code == 200:
-                raw_data = response.json()
-                less_events_data = filter_events(raw_data, seconds=120)
-                clean_data = prune_data(less_events_data)
-                
-                # Extract Game Mode & Time
-                game_data = raw_data.get('gameData', {})
-                game_mode = game_data.get('gameMode', 'UNKNOWN')
-                game_time = game_data.get('gameTime', 0)
-                state.current_game_mode = game_mode
-                
-                # Extract Player Info & Teams
-                active_player_name = raw_data.get('activePlayer', {}).get('summonerName', 'Unknown')
-                all_players = raw_data.get('allPlayers', [])
-                
-                my_team = []
-                enemy_team = []
-                my_champion = "Unknown"
-                my_position = "UNKNOWN"
-                direct_opponent = "Inconnu"
+            # Extract Player Info & Teams
+            active_player_name = raw_data.get('activePlayer', {}).get('summonerName', 'Unknown')
+            all_players = raw_data.get('allPlayers', [])
+            
+            my_team = []
+            enemy_team = []
+            my_champion = "Unknown"
+            my_position = "UNKNOWN"
+            direct_opponent = "Inconnu"
+            my_team_id = None
+            
+            for p in all_players:
+                champ = p.get('championName', 'Unknown')
+                name = p.get('summonerName', '')
+                team = p.get('team', '')
+                position = p.get('position', '')
                 
-                for p in all_players:
-                    champ = p.get('championName', 'Unknown')
-                    name = p.get('summonerName', '')
-                    team = p.get('team', '')
-                    position = p.get('position', '')
+                if name == active_player_name:
+                    my_champion = champ
+                    my_team_id = team
+                    my_position = position
                     
-                    if name == active_player_name:
-                        my_champion = champ
-                        my_team_id = team
-                        my_position = position
-                        
-                # Second pass to sort teams and find opponent
-                for p in all_players:
-                    champ = p.get('championName', 'Unknown')
-                    team = p.get('team', '')
-                    position = p.get('position', '')
-                    
-                    if team == my_team_id:
-                        my_team.append(champ)
-                    else:
-                        enemy_team.append(champ)
-                        if position == my_position and position != "":
-                            direct_opponent = champ
-
-                # Save valid game data for post-game analysis
-                state.last_valid_game_data = raw_data
-
-                # Generate Advice
-                ai.generate_advice(
-                    clean_data, game_time, my_champion, my_position, 
-                    direct_opponent, my_team, enemy_team, game_mode
+            # Second pass to sort teams and find opponent
+            for p in all_players:
+                champ = p.get('championName', 'Unknown')
+                team = p.get('team', '')
+                position = p.get('position', '')
+                
+                if team == my_team_id:
+                    my_team.append(champ)
+                else:
+                    enemy_team.append(champ)
+                    if position == my_position and position != "":
+                        direct_opponent = champ
+
+            # Save valid game data for post-game analysis
+            state.last_valid_game_data = raw_data
+
+            if settings.debug_mode:
+                # Serialized by the capture thread; replayable with `python -m nexus.capture replay`
+                debug_capture.record('snapshot', session=self.session.name, data={
+                    'activePlayer': raw_data['activePlayer'],
+                    'allPlayers': raw_data['allPlayers'],
+                    'gameData': game_data,
+                    'new_events': new_events,
+                })
+
+            # Generate Advice (off the polling thread) when the scheduler sees a reason to
+            active_player = raw_data.get('activePlayer', {})
+            my_names = {active_player.get(k) for k in ('summonerName', 'riotIdGameName', 'riotId')} - {None}
+            advice_scheduler = state.advice_scheduler
+            advice_scheduler.observe(new_events, my_names, all_players, my_team_id, now)
+
+            if ai.backend and advice_scheduler.due(now):
+                advice_scheduler.mark_called(now)
+                # Team and lane aggregates, from the raw data (item ids and prices): only when prompting
+                features = compute_features(raw_data, my_team_id, timeline.events, timeline, Config.GOLD_TREND_POINTS)
+                worker.submit(
+                    'advice', ai.generate_advice, self.session,
+                    clean_data, game_time, my_champion, my_position,
+                    direct_opponent, my_team, enemy_team, game_mode, features
                 )
+            state.advice_plan = advice_scheduler.plan(now)
+
+        except ApiNotReady as e:
+            print(f"API returned non-200 status: {e}", flush=True)
+            metrics.POLL_ERRORS.labels(kind="not_ready").inc()
+            scheduler.offline(reachable=True)
+            state.publish(
+                latest_advice=get_loader_html("Partie détectée. En attente de l'initialisation de l'API..."),
+                current_game_mode="Unknown",
+            )
 
-            else:
-                print(f"API returned non-200 status: {response.status_code}", flush=True)
-                state.latest_advice = get_loader_html("Partie détectée. En attente de l'initialisation de l'API...")
-                state.current_game_mode = "Unknown"
-            
         except requests.exceptions.ConnectionError:
             print("Connection Error: Game probably not running or API not accessible.", flush=True)
-            
+            metrics.POLL_ERRORS.labels(kind="connection").inc()
+            scheduler.offline()
+            resources.clear()
+            self.last_game_time = 0
+
             # POST-GAME ANALYSIS
             if state.last_valid_game_data:
-                full_game_data = prune_data(state.last_valid_game_data)
-                ai.generate_post_game_report(full_game_data)
-            else:
-                state.latest_advice = get_loader_html("En attente du lancement de la partie...")
-                state.current_game_mode = "Offline"
-            pass
+                # Phases were summarized during the game: only the end state and
+                # the part not covered yet are left to send
+                final_game_data = project_game_data({
+                    k: v for k, v in state.last_valid_game_data.items() if k != 'events'
+                })
+                phase_summarizer = state.phase_summarizer
+                end_state = format_end_state(final_game_data)
+                tail_summary = state.timeline.window_summary(phase_summarizer.covered_until, float('inf'))
+                # Written by the history thread: the game's timeline and advice are not touched anymore
+                game_id = match_store.save(self.session.name, state.last_valid_game_data, state.timeline, state.advice_history)
+                state.last_valid_game_data = None # Reset to avoid loop
+                state.new_game(current_game_mode="PostGame")
+                worker.cancel()
+                worker.submit(
+                    'advice', ai.generate_post_game_report, self.session,
+                    end_state, phase_summarizer.ordered_summaries(), tail_summary, game_id
+                )
+            elif state.current_game_mode != "PostGame":
+                state.publish(
+                    latest_advice=get_loader_html("En attente du lancement de la partie..."),
+                    current_game_mode="Offline",
+                )
         except Exception as e:
             print(f"Polling Error: {e}", flush=True)
-            state.latest_advice = f"❌ Erreur technique : {str(e)}"
-            state.current_game_mode = "Error"
+            metrics.POLL_ERRORS.labels(kind="other").inc()
+            state.publish(latest_advice=f"❌ Erreur technique : {str(e)}", current_game_mode="Error")
             
-        # Adaptive polling strategy
-        current_time = time.time()
-        if ai.model and (current_time - state.last_gemini_call < (Config.AI_UPDATE_INTERVAL - 10)):
-             # If we just called Gemini, we can sleep longer
-            time.sleep(Config.POLL_INTERVAL_SLOW)
-        else:
-            # If we are close to the window or disconnected, poll faster
-            time.sleep(Config.POLL_INTERVAL_FAST)
+        metrics.POLL_ROUND_SECONDS.observe(time.perf_counter() - round_started)
+        return scheduler.next_delay(time.time())
+
+    @staticmethod
+    def _recent_events(event_log, game_time):
+        with metrics.FILTER_EVENTS_SECONDS.time():
+            return event_log.window(game_time, Config.EVENT_WINDOW)
+
+class Poller:
+    """
+    Runs the watchers of every session on a bounded thread pool.
+
+    A single scheduling thread keeps the watchers in a heap ordered by their next
+    poll time and hands the due ones to the pool; a watcher is rescheduled only
+    once its round is over, so it is never polled twice at once. Live Client
+    requests are short (see Config.LIVE_CLIENT_*), so a few threads serve dozens
+    of sessions.
+    """
+
+    def __init__(self, max_workers):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="poller")
+        self._queue = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self, sessions):
+        with self._cond:
+            for session in sessions:
+                print(f"Watching session {session.name} (Target: {session.client.target_ip})...", flush=True)
+                heapq.heappush(self._queue, (0, next(self._order), Watcher(session)))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="poller", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue or self._queue[0][0] > time.time():
+                    self._cond.wait(self._queue[0][0] - time.time() if self._queue else None)
+                _, _, watcher = heapq.heappop(self._queue)
+            self._executor.submit(self._poll, watcher)
+
+    def _poll(self, watcher):
+        delay = Config.OFFLINE_BACKOFF_MAX
+        try:
+            delay = watcher.poll_once()
+        except Exception as e:
+            print(f"Poller Error ({watcher.session.name}): {e}", flush=True)
+        finally:
+            with self._cond:
+                heapq.heappush(self._queue, (time.time() + delay, next(self._order), watcher))
+                self._cond.notify()
+
+# Singleton
+poller = Poller(Config.POLLER_POOL_SIZE)
@@ -0,0 +1,67 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .config import Config
+
+class AdviceWorker:
+    """
+    Runs the AI calls of one session off the polling thread, on a pool shared by every session.
+
+    Jobs are submitted to a named lane ('advice', 'summary'). Only the newest
+    pending job of a lane is kept: submitting while one is already queued
+    replaces it, so a stale game snapshot is never sent. A lane runs one job at
+    a time, and at most `concurrency` lanes of the session run at once so that
+    one session cannot hold the whole pool. The job being executed can check
+    `cancelled()` to know whether its result should be discarded.
+    """
+
+    def __init__(self, executor, concurrency=1):
+        self._executor = executor
+        self._concurrency = concurrency
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._running = set()
+        self._ticket = 0
+        self._cancelled_upto = 0
+        self._local = threading.local()
+
+    def submit(self, lane, fn, *args, **kwargs):
+        with self._lock:
+            self._ticket += 1
+            self._pending[lane] = (self._ticket, fn, args, kwargs)
+            self._dispatch()
+
+    def cancel(self):
+        """Drops the pending jobs and flags the running ones as cancelled."""
+        with self._lock:
+            self._pending.clear()
+            self._cancelled_upto = self._ticket
+
+    def cancelled(self):
+        ticket = getattr(self._local, 'ticket', None)
+        return ticket is not None and ticket <= self._cancelled_upto
+
+    def _dispatch(self):
+        # Called with the lock held
+        for lane in list(self._pending):
+            if len(self._running) >= self._concurrency:
+                break
+            if lane in self._running:
+                continue
+            ticket, fn, args, kwargs = self._pending.pop(lane)
+            self._running.add(lane)
+            self._executor.submit(self._execute, lane, ticket, fn, args, kwargs)
+
+    def _execute(self, lane, ticket, fn, args, kwargs):
+        self._local.ticket = ticket
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            print(f"Advice Worker Error ({lane}): {e}", flush=True)
+        finally:
+            self._local.ticket = None
+            with self._lock:
+                self._running.discard(lane)
+                self._dispatch()
+
+# Singleton: AI calls of every session
+ai_pool = ThreadPoolExecutor(max_workers=Config.AI_POOL_SIZE, thread_name_prefix="ai")